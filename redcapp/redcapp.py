@@ -37,13 +37,23 @@
 # ==============================================================================
 from __future__ import annotations
 
+import abc
 import csv
-from bisect import bisect_left
+import hashlib
+import pickle
+import tempfile
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from itertools import groupby
 from math import exp, floor, radians
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
 from operator import inv
-from os import path, remove
+from os import chmod, path, remove, replace, umask
 from pathlib import Path
+from time import perf_counter
 from typing import Any, Literal
 
 import netCDF4 as nc
@@ -56,10 +66,17 @@ from scipy.interpolate import RegularGridInterpolator
 from scipy.ndimage import (
     convolve,
     gaussian_filter,
-    generic_filter,
     maximum_filter,
     minimum_filter,
 )
+from scipy.sparse import csr_matrix
+
+try:
+    import numba
+    from numba import njit, prange
+except ImportError:  # optional, see the jit option of DownScaling
+    numba = njit = None
+    prange = range
 
 
 class ERAgeneric(object):
@@ -772,6 +789,722 @@ class DataManager(object):
         return self.file_get(nomenclature)
 
 
+def _axis_weights(grid, x):
+    """Return the lower bracketing index and the weight of the upper node of
+    given coordinates along one axis of a regular grid.
+
+    Coordinates outside the grid are linearly extrapolated from the edge
+    interval, which is what ``RegularGridInterpolator`` does with
+    ``bounds_error=False, fill_value=None``.
+
+    Parameters
+    ----------
+    grid : array_like
+        Monotonic 1-D coordinates of the grid axis (ascending or descending).
+    x : array_like
+        Coordinates to interpolate to.
+
+    Returns
+    -------
+    index: np.array
+        Index ``i`` of the lower node, so that values are interpolated
+        between ``grid[i]`` and ``grid[i + 1]``.
+    weight: np.array
+        Weight of the node ``i + 1``. The weight of node ``i`` is
+        ``1 - weight``.
+    """
+    grid = np.asarray(grid, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    if grid.size < 2:
+        raise ValueError("Linear interpolation needs at least 2 grid points.")
+
+    descending = grid[0] > grid[-1]
+    if descending:
+        grid = grid[::-1]
+
+    index = np.searchsorted(grid, x) - 1
+    np.clip(index, 0, grid.size - 2, out=index)
+    weight = (x - grid[index]) / (grid[index + 1] - grid[index])
+
+    if descending:
+        index = grid.size - 2 - index
+        weight = 1 - weight
+
+    return index, weight
+
+
+def _node_window(index, size, halo=1):
+    """Return the slice of the grid nodes used by given lower indices (see
+    _axis_weights()), extended by halo nodes on each side."""
+    return slice(
+        max(int(index.min()) - halo, 0), min(int(index.max()) + 2 + halo, size)
+    )
+
+
+def _read(variable, index, dtype=np.float64):
+    """Read a hyperslab of a netcdf variable.
+
+    In float64, values are read as netCDF4 returns them. In another dtype,
+    packed integers are unpacked straight into that dtype (scale_factor and
+    add_offset are applied in it, without a float64 intermediate) and
+    missing values are set to NaN, so that a plain array is returned and no
+    mask is built when the hyperslab holds no fill value.
+
+    Parameters
+    ----------
+    variable : netCDF4.Variable
+        Variable to read
+    index : tuple
+        Index of the hyperslab
+    dtype : data-type, optional
+        Data type of the returned values, by default np.float64
+    """
+    if np.dtype(dtype) == np.float64:
+        return variable[index]
+
+    variable.set_auto_maskandscale(False)
+    try:
+        raw = variable[index]
+    finally:
+        variable.set_auto_maskandscale(True)
+
+    attrs = variable.ncattrs()
+    fill = [
+        getattr(variable, key)
+        for key in ("_FillValue", "missing_value")
+        if key in attrs
+    ]
+    missing = np.isin(raw, fill) if fill else None
+
+    values = raw.astype(dtype)
+    if "scale_factor" in attrs:
+        values *= np.asarray(variable.scale_factor, dtype)
+    if "add_offset" in attrs:
+        values += np.asarray(variable.add_offset, dtype)
+    if missing is not None and missing.any():
+        values[missing] = np.nan
+
+    return values
+
+
+def _leading(values, array):
+    """Return values [variable] of several variables shaped to broadcast
+    along the leading dimension of array and in its data type, as a scalar
+    would be, or a scalar value as it is."""
+    if np.ndim(values) == 0:
+        return values
+    values = np.asarray(values, array.dtype)
+
+    return values.reshape((-1,) + (1,) * (array.ndim - 1))
+
+
+def _bilinear_stencil(iy, wy, ix, wx, nlon):
+    """Return the index [site, 4] of the 4 nodes surrounding each site in a
+    raveled grid of nlon columns, and their bilinear weights [site, 4],
+    from the lower indices and upper weights of the sites along each axis
+    (see _axis_weights())."""
+    corner = iy * nlon + ix
+    index = np.stack([corner, corner + 1, corner + nlon, corner + nlon + 1], axis=1)
+    weight = np.stack(
+        [(1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx], axis=1
+    )
+
+    return index, weight
+
+
+class BilinearOperator(object):
+    """
+    Sparse bilinear interpolation operator from a regular coarse grid to a
+    fixed set of sites. The stencil (4 node indices and 4 weights per site)
+    is computed once, and applying the operator to a field is one sparse
+    matrix product, whatever the number of leading dimensions (e.g. levels).
+
+    Args:
+        gridLat: Latitude of the coarse grid
+        gridLon: Longitude of the coarse grid
+        lats: Latitude of the sites to interpolate
+        lons: Longitude of the sites to interpolate
+        dtype: Data type of the weights, and thus of interpolated values.
+            Default is np.float64.
+        halo: When given, the operator only applies to the window of the
+            grid covering the sites, extended by halo cells on each side,
+            which is given by the window attribute as (rows, cols) slices.
+            Default is None, the whole grid.
+
+    Example:
+        op = BilinearOperator(pl['lat'][:], pl['lon'][:], lats, lons)
+        t_interp = op(pl['Temperature'][0, :, :, :])  # [level, site]
+
+        op = BilinearOperator(pl['lat'][:], pl['lon'][:], lats, lons, halo=1)
+        t_interp = op(pl['Temperature'][(0, slice(None)) + op.window])
+    """
+
+    def __init__(self, gridLat, gridLon, lats, lons, dtype=np.float64, halo=None):
+        iy, wy = _axis_weights(gridLat, lats)
+        ix, wx = _axis_weights(gridLon, lons)
+        rows = slice(0, len(gridLat))
+        cols = slice(0, len(gridLon))
+        if halo is not None and iy.size:
+            rows = _node_window(iy, len(gridLat), halo)
+            cols = _node_window(ix, len(gridLon), halo)
+            iy = iy - rows.start
+            ix = ix - cols.start
+        nlon = cols.stop - cols.start
+
+        index, weight = _bilinear_stencil(iy, wy, ix, wx, nlon)
+        self.setStencil(index, weight.astype(dtype, copy=False), (rows, cols))
+
+    @classmethod
+    def fromStencil(cls, index, weight, window):
+        """Return the operator of given stencil, e.g. of another operator
+        saved with its index, weight and window attributes."""
+        operator = cls.__new__(cls)
+        operator.setStencil(index, weight, window)
+
+        return operator
+
+    def setStencil(self, index, weight, window):
+        """Set the stencil [site, 4] of the operator on the (rows, cols)
+        window of its grid."""
+        rows, cols = window
+        self.window = (rows, cols)
+        self.shape = (rows.stop - rows.start, cols.stop - cols.start)
+        self.size = index.shape[0]
+        self.index = index
+        self.weight = weight
+        self.matrix = csr_matrix(
+            (
+                self.weight.ravel(),
+                self.index.ravel(),
+                np.arange(0, 4 * self.size + 1, 4),
+            ),
+            shape=(self.size, self.shape[0] * self.shape[1]),
+        )
+
+    def __call__(self, values):
+        """Interpolate a field formatted in [..., lat, lon] to the sites.
+        Returned values are formatted in [..., site]."""
+        values = np.asarray(values)
+        lead = values.shape[:-2]
+        flat = values.reshape(-1, self.shape[0] * self.shape[1])
+        out = self.matrix.dot(flat.T).T  # site-major in memory
+
+        return out.reshape(lead + (self.size,))
+
+
+def _axis_matrix(index, weight, size, dtype=np.float64):
+    """Return the dense matrix [site, node] interpolating linearly along one
+    grid axis of given size, from the lower indices and upper weights of the
+    sites (see _axis_weights())."""
+    matrix = np.zeros((index.size, size), dtype)
+    sites = np.arange(index.size)
+    matrix[sites, index] = 1 - weight
+    matrix[sites, index + 1] = weight
+
+    return matrix
+
+
+def _grid_interp(gridLat, gridLon, values, lats, lons, size=2**22):
+    """Return values [lat, lon] of a regular grid interpolated bilinearly to
+    another regular grid given by its latitude and longitude axes.
+
+    The interpolation is separable: the two bracketing rows of each output
+    row are blended, and then the two bracketing columns of each output
+    column, so that only the index and weight of each output row and
+    column are needed. Points outside the grid are extrapolated as by
+    RegularGridInterpolator with fill_value=None. Output rows are
+    interpolated band by band, so that the temporaries do not grow with
+    the size of the output.
+
+    Parameters
+    ----------
+    gridLat, gridLon : array_like
+        Axes of the grid of values
+    values : np.array
+        Values formatted in [lat, lon]
+    lats, lons : array_like
+        Axes of the grid to interpolate to
+    size : int, optional
+        Number of output cells interpolated at once, by default 2**22
+
+    Returns
+    -------
+    values: np.array
+        Interpolated values formatted in [lats, lons]
+    """
+    iy, wy = _axis_weights(gridLat, lats)
+    ix, wx = _axis_weights(gridLon, lons)
+    values = np.asarray(values)
+    out = np.empty((iy.size, ix.size), np.result_type(values, wy))
+    band = max(1, int(size // max(1, ix.size)))
+    for beg in range(0, iy.size, band):
+        rows = slice(beg, beg + band)
+        w = wy[rows, None]
+        part = values[iy[rows]] * (1 - w) + values[iy[rows] + 1] * w
+        out[rows] = part[:, ix] * (1 - wx) + part[:, ix + 1] * wx
+
+    return out
+
+
+class GridOperator(BilinearOperator):
+    """
+    Bilinear interpolation operator from a regular coarse grid to a regular
+    grid of sites given by its latitude and longitude axes, e.g. a window of
+    the dem. Bilinear interpolation between regular grids is separable, so
+    only the lower index and the weight of each row and each column of
+    sites are kept, which is O(rows + cols) instead of the O(rows x cols)
+    stencil of BilinearOperator, and the operator is applied as two dense
+    products along latitude and then longitude. With a halo, the window of
+    the coarse grid is only a few cells wide and these products cost about
+    as much as the sparse one.
+
+    The stencil (index and weight attributes) and the sparse matrix of
+    BilinearOperator are only built when accessed, e.g. by the "node"
+    engine or the jit kernel of DownScaling.
+
+    Args:
+        gridLat: Latitude of the coarse grid
+        gridLon: Longitude of the coarse grid
+        lats: Latitude axis of the grid of sites
+        lons: Longitude axis of the grid of sites
+        dtype: Data type of the weights, see BilinearOperator
+        halo: Halo of the window of the coarse grid, see BilinearOperator
+
+    Example:
+        op = GridOperator(pl['lat'][:], pl['lon'][:], lats, lons, halo=1)
+        # [level, site], with sites in the raster order of lats x lons
+        t_interp = op(pl['Temperature'][(0, slice(None)) + op.window])
+    """
+
+    def __init__(self, gridLat, gridLon, lats, lons, dtype=np.float64, halo=None):
+        iy, wy = _axis_weights(gridLat, lats)
+        ix, wx = _axis_weights(gridLon, lons)
+        rows = slice(0, len(gridLat))
+        cols = slice(0, len(gridLon))
+        if halo is not None and iy.size and ix.size:
+            rows = _node_window(iy, len(gridLat), halo)
+            cols = _node_window(ix, len(gridLon), halo)
+            iy = iy - rows.start
+            ix = ix - cols.start
+        self.setAxes(iy, wy, ix, wx, (rows, cols), dtype)
+
+    @classmethod
+    def fromAxes(cls, iy, wy, ix, wx, window, dtype=np.float64):
+        """Return the operator of given axes, e.g. of another operator saved
+        with its axes and window attributes."""
+        operator = cls.__new__(cls)
+        operator.setAxes(iy, wy, ix, wx, window, dtype)
+
+        return operator
+
+    def setAxes(self, iy, wy, ix, wx, window, dtype=np.float64):
+        """Set the lower indices and upper weights of the rows (iy, wy) and
+        of the columns (ix, wx) of sites on the (rows, cols) window of the
+        grid, see _axis_weights()."""
+        rows, cols = window
+        self.window = (rows, cols)
+        self.shape = (rows.stop - rows.start, cols.stop - cols.start)
+        self.size = iy.size * ix.size
+        self.axes = (iy, wy, ix, wx)
+        self.dtype = np.dtype(dtype)
+        self.rowMatrix = _axis_matrix(iy, wy, self.shape[0], dtype)  # [row, lat]
+        self.colMatrix = _axis_matrix(ix, wx, self.shape[1], dtype).T  # [lon, col]
+
+    def __getattr__(self, name):
+        # the stencil of BilinearOperator, built on first access
+        if name not in ("index", "weight", "matrix"):
+            raise AttributeError(name)
+        iy, wy, ix, wx = self.axes
+        index, weight = _bilinear_stencil(
+            np.repeat(iy, ix.size),
+            np.repeat(wy, ix.size),
+            np.tile(ix, iy.size),
+            np.tile(wx, iy.size),
+            self.shape[1],
+        )
+        self.setStencil(index, weight.astype(self.dtype, copy=False), self.window)
+
+        return getattr(self, name)
+
+    def __call__(self, values):
+        """Interpolate a field formatted in [..., lat, lon] to the sites.
+        Returned values are formatted in [..., site], with sites in raster
+        order."""
+        values = np.asarray(values)
+        if not np.isfinite(values).all():
+            # the dense products would spread a missing value over a whole
+            # row or column of sites, while the stencil only spreads it over
+            # the sites of the 4 surrounding cells
+            return BilinearOperator.__call__(self, values)
+        lead = values.shape[:-2]
+        out = np.matmul(np.matmul(self.rowMatrix, values), self.colMatrix)
+
+        return out.reshape(lead + (self.size,))
+
+
+class GridSites(object):
+    """
+    Regular grid of sites given by its latitude and longitude axes and its
+    geopotential raster, e.g. a window of the dem. It stands for the
+    [site, 3] array [lat, lon, geop] of the raveled grid (see demGrid())
+    without the coordinates of every site: sites[:, 2] is a view of the
+    raveled geopotential, and the coordinate columns are only built when
+    indexed. Bilinear operators to the sites are GridOperator.
+
+    Args:
+        lats: Latitude axis of the grid
+        lons: Longitude axis of the grid
+        geop: Geopotential of the sites formated in [lat, lon]
+
+    Example:
+        sites = GridSites(lats, lons, ele * 9.80665)
+        op = GridOperator(pl['lat'][:], pl['lon'][:], sites.lats, sites.lons)
+        ele = sites[:, 2]  # [site]
+    """
+
+    def __init__(self, lats, lons, geop):
+        self.lats = np.asarray(lats)
+        self.lons = np.asarray(lons)
+        self.geop = np.asarray(geop).reshape((self.lats.size, self.lons.size))
+        self.size = self.geop.size
+        self.shape = (self.size, 3)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        sites, column = index
+        if not isinstance(column, (int, np.integer)):
+            return np.stack([self[sites, k] for k in range(3)[column]], axis=-1)
+        if column in (2, -1):
+            values = self.geop.reshape(-1)
+        elif column in (0, -3):
+            values = np.repeat(self.lats, self.lons.size)
+        elif column in (1, -2):
+            values = np.tile(self.lons, self.lats.size)
+        else:
+            raise IndexError("sites have 3 columns [lat, lon, geop]")
+
+        return values[sites]
+
+
+def _profile_index(values, col, ndim):
+    """Return values raveled in memory order (without copy when possible)
+    and the flat index of level 0 of the profile of each site, for values
+    formatted in [..., level, site] and sites broadcast over ndim
+    dimensions. The level stride is returned as well."""
+    nlev, ncol = values.shape[-2:]
+    values = values.reshape((-1, nlev, ncol))
+    flat = np.ravel(values, order="K")
+    if not np.may_share_memory(flat, values):
+        values = np.ascontiguousarray(values)
+        flat = values.reshape(-1)
+    sb, sl, sc = (stride // values.itemsize for stride in values.strides)
+    base = np.arange(values.shape[0]).reshape((-1,) + (1,) * ndim) * sb
+
+    return flat, base + col * sc, sl
+
+
+def _bisect(z_flat, base, stride, ele, nlev):
+    """Return the number of levels below ele for the profiles starting at
+    base in z_flat, see _level_bracket()."""
+    # n is grown by decreasing powers of 2
+    n = np.zeros(np.broadcast_shapes(np.shape(base), np.shape(ele)), dtype=np.intp)
+    step = 1 << (nlev.bit_length() - 1)
+    while step:
+        upper = np.minimum(n + step, nlev)
+        below = z_flat[base + (upper - 1) * stride] < ele
+        below &= n + step <= nlev
+        n += step * below
+        step >>= 1
+
+    return n
+
+
+def _level_bracket(z_interp, ele, col=None, guess=None):
+    """Return the upper pressure level bracketing given elevations.
+
+    This is a vectorized ``bisect_left`` along the level axis, evaluated for
+    all sites at once by binary lifting: each of the log2(level) steps is one
+    gather and one comparison over all sites. The returned index ``n`` is
+    clipped to ``[1, level - 1]`` so that levels ``n - 1`` and ``n`` always
+    exist, and sites outside the profile are extrapolated from the end
+    interval.
+
+    With a guess, e.g. the brackets of the previous time step, the guessed
+    brackets are only verified, with 2 gathers and comparisons over all
+    sites, and only the few sites whose bracket moved are searched again,
+    so the result is the same as without a guess.
+
+    Parameters
+    ----------
+    z_interp : np.array
+        Geopotential of different pressure levels, formatted in
+        [level, site] and ascending along levels. Leading dimensions, e.g.
+        [time, level, site], hold independent sets of profiles.
+    ele : np.array
+        Geopotential of the sites, formatted in [site] or [..., site] for
+        several sets of elevations sharing the same profiles.
+    col : np.array, optional
+        Column of z_interp holding the profile of each site, broadcastable
+        to ele. By default, site ``i`` uses column ``i``.
+    guess : np.array, optional
+        Guessed index of the upper bracketing level, formatted in the
+        shape of ele broadcast with col.
+
+    Returns
+    -------
+    n: np.array
+        Index of the upper bracketing level, formatted in the leading
+        dimensions of z_interp followed by the shape of ele.
+    """
+    batch = z_interp.shape[:-2]
+    nlev, ncol = z_interp.shape[-2:]
+    if col is None:
+        col = np.arange(ncol)
+    shape = np.broadcast_shapes(np.shape(ele), np.shape(col))
+    z_flat, base, stride = _profile_index(z_interp, col, len(shape))
+
+    if guess is None:
+        n = _bisect(z_flat, base, stride, ele, nlev)
+        return np.clip(n, 1, nlev - 1).reshape(batch + shape)
+
+    n = np.clip(guess, 1, nlev - 1).astype(np.intp)
+    n = np.repeat(n[None], base.shape[0], axis=0)
+    # brackets that are too high or too low
+    miss = z_flat[base + (n - 1) * stride] >= ele
+    miss &= n > 1
+    low = z_flat[base + n * stride] < ele
+    low &= n < nlev - 1
+    miss |= low
+    if miss.any():
+        base = np.broadcast_to(base, n.shape)[miss]
+        ele = np.broadcast_to(ele, n.shape)[miss]
+        n[miss] = np.clip(_bisect(z_flat, base, stride, ele, nlev), 1, nlev - 1)
+
+    return n.reshape(batch + shape)
+
+
+def _vertical_interp(t_interp, z_interp, ele, col=None, state=None):
+    """Return values linearly interpolated between pressure levels at given
+    elevations, see _level_bracket() for the arguments.
+
+    t_interp may have one more leading dimension than z_interp, holding
+    several variables [variable, ...] interpolated with the same brackets,
+    in which case the values are returned with that dimension too.
+
+    When a state dictionary is given, the brackets of the last time step are
+    stored in it under "bracket", as the smallest unsigned integers holding
+    them, and used as the guess of the next call with sites of the same
+    shape."""
+    batch = z_interp.shape[:-2]
+    if col is None:
+        col = np.arange(z_interp.shape[-1])
+    guess = None
+    if state is not None:
+        guess = state.get("bracket")
+        if guess is not None and guess.shape != np.broadcast_shapes(
+            np.shape(ele), np.shape(col)
+        ):
+            guess = None
+    n = _level_bracket(z_interp, ele, col, guess)
+    shape = n.shape[len(batch) :]
+    n = n.reshape((-1,) + shape)
+    if state is not None:
+        state["bracket"] = n[-1].astype(np.min_scalar_type(z_interp.shape[-2]))
+    z_flat, z_base, z_stride = _profile_index(z_interp, col, len(shape))
+    upperZ = z_flat[z_base + n * z_stride]
+    dZ = upperZ - z_flat[z_base + (n - 1) * z_stride]  # <0
+    dE = ele - upperZ  # >0
+
+    multi = np.ndim(t_interp) > np.ndim(z_interp)
+    values = []
+    for t_var in t_interp if multi else [t_interp]:
+        t_flat, t_base, t_stride = _profile_index(t_var, col, len(shape))
+        upperT = t_flat[t_base + n * t_stride]
+        dG = upperT - t_flat[t_base + (n - 1) * t_stride]  # <0
+        dG /= dZ
+        dG *= dE
+        dG += upperT
+        values.append(dG.reshape(batch + shape))
+
+    return np.stack(values) if multi else values[0]
+
+
+def _fused_site(
+    i, gridT, gridZ, index, weight, gridSa, sa_index, sa_weight, ele, kelvin, out
+):
+    """Compute site i of _fused_interp() from the 4 profiles surrounding it,
+    at the given index of the node axis of gridT and gridZ and with the
+    given bilinear weights."""
+    nvar, ntime, nlev = gridT.shape[:3]
+    for t in range(ntime):
+        for k in range(2):
+            # bisect_left on the levels in ascending elevation
+            lo = 0
+            hi = nlev
+            while lo < hi:
+                mid = (lo + hi) // 2
+                m = nlev - 1 - mid
+                z = weight[0] * gridZ[t, m, index[0]]
+                for j in range(1, 4):
+                    z += weight[j] * gridZ[t, m, index[j]]
+                if z < ele[k, i]:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            n = min(max(lo, 1), nlev - 1)
+
+            upper = nlev - 1 - n
+            upperZ = weight[0] * gridZ[t, upper, index[0]]
+            lowerZ = weight[0] * gridZ[t, upper + 1, index[0]]
+            for j in range(1, 4):
+                upperZ += weight[j] * gridZ[t, upper, index[j]]
+                lowerZ += weight[j] * gridZ[t, upper + 1, index[j]]
+            dZ = upperZ - lowerZ
+            dE = ele[k, i] - upperZ
+
+            for v in range(nvar):
+                upperT = weight[0] * gridT[v, t, upper, index[0]]
+                lowerT = weight[0] * gridT[v, t, upper + 1, index[0]]
+                for j in range(1, 4):
+                    upperT += weight[j] * gridT[v, t, upper, index[j]]
+                    lowerT += weight[j] * gridT[v, t, upper + 1, index[j]]
+                upperT -= kelvin[v]
+                lowerT -= kelvin[v]
+
+                dG = upperT - lowerT
+                dG /= dZ
+                dG *= dE
+                dG += upperT
+                if k == 0:
+                    out[1, v, t, i] = -dG
+                else:
+                    out[0, v, t, i] = dG
+
+        if gridSa.shape[0]:
+            t_sa = sa_weight[i, 0] * gridSa[t, sa_index[i, 0]]
+            for j in range(1, 4):
+                t_sa += sa_weight[i, j] * gridSa[t, sa_index[i, j]]
+            for v in range(nvar):
+                out[1, v, t, i] = t_sa + out[1, v, t, i]
+
+
+def _fused_interp(
+    gridT,
+    gridZ,
+    gridSa,
+    pl_index,
+    pl_weight,
+    sa_index,
+    sa_weight,
+    ele,
+    kelvin,
+    out,
+    cells,
+):
+    """Fused per-site kernel of the "level" engine, see DownScaling.jit.
+
+    For each site and time step, the levels bracketing the surface and dem
+    elevations are searched by bisection on the bilinearly interpolated
+    geopotential, evaluated level by level on the fly, and only the 2
+    bracketing levels of each variable are interpolated. The operations are
+    those of BilinearOperator and _vertical_interp(), in the same order.
+
+    With sites grouped by coarse cell (see DownScaling.cellOrder()), the
+    cells are processed one after another: the profiles of the 4 nodes of
+    a cell are copied once into a small contiguous buffer, which all the
+    sites of the cell then read.
+
+    Parameters
+    ----------
+    gridT : np.array
+        Variables (e.g. temperature [K]) formatted in
+        [variable, time, level, node], with levels in descending elevation
+        as in the files
+    gridZ : np.array
+        Geopotential formatted in [time, level, node]
+    gridSa : np.array
+        2-metre temperature [C] formatted in [time, node], or in [0, node]
+        to leave it out of dt
+    pl_index, pl_weight, sa_index, sa_weight : np.array
+        Stencils [site, 4] of the pressure level and 2-metre temperature
+        operators
+    ele : np.array
+        Geopotential of the sites [2, site], at surface and dem level
+    kelvin : np.array
+        Offset [variable] subtracted from the variables, e.g. 273.15 in the
+        data type of the computation, see DownScaling.offset()
+    out : np.array
+        Output [2, variable, time, site] of pl_obs and dt
+    cells : np.array
+        Offsets [cell + 1] of the runs of sites sharing the nodes of a
+        cell, or an empty array for sites in any order
+    """
+    nvar, ntime, nlev = gridT.shape[:3]
+    if cells.size == 0:
+        for i in prange(ele.shape[1]):
+            _fused_site(
+                i,
+                gridT,
+                gridZ,
+                pl_index[i],
+                pl_weight[i],
+                gridSa,
+                sa_index,
+                sa_weight,
+                ele,
+                kelvin,
+                out,
+            )
+        return
+
+    nodes = np.arange(4)
+    for c in prange(cells.size - 1):
+        index = pl_index[cells[c]]
+        profileT = np.empty((nvar, ntime, nlev, 4), gridT.dtype)
+        profileZ = np.empty((ntime, nlev, 4), gridZ.dtype)
+        for t in range(ntime):
+            for m in range(nlev):
+                for j in range(4):
+                    profileZ[t, m, j] = gridZ[t, m, index[j]]
+                    for v in range(nvar):
+                        profileT[v, t, m, j] = gridT[v, t, m, index[j]]
+        for i in range(cells[c], cells[c + 1]):
+            _fused_site(
+                i,
+                profileT,
+                profileZ,
+                nodes,
+                pl_weight[i],
+                gridSa,
+                sa_index,
+                sa_weight,
+                ele,
+                kelvin,
+                out,
+            )
+
+
+if njit is not None:
+    # compiled on first use and cached on disk for later sessions
+    _fused_site = njit(cache=True)(_fused_site)
+    _fused_interp = njit(parallel=True, cache=True)(_fused_interp)
+
+
+def _numba_threads():
+    """Return whether the threading layer of numba has been started in this
+    process, e.g. by the jit option of another DownScaling, after which the
+    process must not fork."""
+    if numba is None:
+        return False
+    try:
+        numba.threading_layer()
+    except ValueError:  # not started yet
+        return False
+    return True
+
+
 class DownScaling(object):
     """
     Return object for downscaling that has methods for interpolationg
@@ -780,6 +1513,81 @@ class DownScaling(object):
 
     Args:
         dem: A required fine-scale dem in netcdf format
+        engine: Downscaling engine of upper-air temperature, one of
+            ["level", "node"]. "level" interpolates every pressure level to
+            the sites and then interpolates between the two levels
+            bracketing each site. "node" evaluates the vertical profile
+            only at the 4 coarse nodes surrounding each site, at the site
+            elevation, and blends these values with the bilinear weights.
+            This takes about 4 x sites instead of 2 x levels x sites values
+            per time step. See nodeInterp() for its deviation from "level".
+        block: Number of time steps read and interpolated at once by
+            spatial_pl_dt() and stationTimeSeries(). Larger blocks make fewer
+            and larger reads and let the interpolation vectorize across time,
+            at the cost of block times more memory for the intermediate
+            [time, level, site] arrays. Default is 1.
+        tile: Size of the tiles of the dem, as a number of rows and columns
+            or as a (rows, columns) tuple. The dem is downscaled tile by
+            tile, each with its own interpolation stencils, so that the
+            memory used by the intermediate [level, site] arrays is bounded
+            by the tile size rather than by the dem size. Default is None,
+            the whole dem at once.
+        dtype: Floating point type of the computation, one of ["float64",
+            "float32"]. In "float32", packed reanalysis values are unpacked
+            straight into float32 and all interpolation buffers are float32,
+            which halves the memory traffic of the time loop. Use
+            deviation(..., dtype="float32") to measure the loss of accuracy
+            on given data. Default is "float64".
+        prune: Number of extra pressure levels kept on each side of the
+            levels that can bracket the sites when reading temperatures, or
+            None to read all levels. With a number, the geopotential of each
+            block of time steps is read first, and only the levels between
+            the highest level lying below all sites of the tile and the
+            lowest level lying above all of them, plus prune levels on each
+            side, are read and interpolated (see levelWindow()). Sites that
+            are extrapolated outside the coarse grid may need a margin of 1
+            or more to be bracketed as with all levels. Default is None.
+        warm: Warm-start the search of the pressure levels bracketing each
+            site from the brackets of the previous time step, which are
+            kept as small unsigned integers with the interpolation stencils
+            of the sites. Brackets rarely change from one time step to the
+            next, so they are mostly only verified. Results are the same
+            either way. Default is True.
+        dtmode: Evaluation of the land surface influence dt, one of
+            ["site", "node"]. "site" evaluates dt at every site. "node"
+            evaluates it only at the coarse nodes of the pressure level
+            grid, at their own surface geopotential, and interpolates it
+            bilinearly to the sites. dt only depends on coarse fields and
+            is smooth, so this turns its cost from the number of sites into
+            the number of coarse nodes. Use deviation(..., dtmode="node") to
+            measure the deviation from "site" on given data. Default is
+            "site".
+        jit: Use a compiled kernel fusing, for each site, the bilinear
+            interpolation, the bracket search, the vertical interpolation
+            and dt, without [level, site] temporaries. It needs numba, and
+            the NumPy path is used without it as well as with the "node"
+            engine or dtmode. Use deviation(..., jit=True) to check both
+            paths against each other. The threading layers of numba are not
+            fork-safe, so that the worker processes of mapBlocks() are then
+            started with spawn, as well as those of any DownScaling once the
+            kernel has run in the process, and the calling script must be
+            protected by ``if __name__ == "__main__":``. Default is False.
+        cache: Directory of the cache of the static geometry of the sites,
+            i.e. the interpolated surface geopotential and the bilinear
+            stencils, or None to compute it at every run. The geometry of
+            each tile or station set is saved in a .npz file keyed by a hash
+            of the site coordinates, of the lat/lon axes of the reanalysis
+            files and of the geopotential, so that later runs on the same
+            dem and reanalysis grid skip its computation. Default is None.
+        order: Order in which the sites of the dem are processed, one of
+            ["raster", "cell"]. "cell" groups the sites of each tile by the
+            coarse cell of the pressure level grid containing them (see
+            cellOrder()), so that the sites reading the same 4 coarse
+            profiles are processed together: the jit kernel then copies the
+            profiles of each cell once for all its sites, and the gathers
+            of the "node" engine run over contiguous nodes. Results are
+            scattered back to raster order when written. Default is
+            "raster".
 
     Example:
         dem  = 'example_alps.nc'
@@ -791,8 +1599,58 @@ class DownScaling(object):
 
     """
 
-    def __init__(self, geop, sa, pl, dem=None):
+    def __init__(
+        self,
+        geop,
+        sa,
+        pl,
+        dem=None,
+        engine: Literal["level", "node"] = "level",
+        block: int = 1,
+        tile: int | tuple | None = None,
+        dtype: Literal["float64", "float32"] = "float64",
+        prune: int | None = None,
+        warm: bool = True,
+        dtmode: Literal["site", "node"] = "site",
+        jit: bool = False,
+        cache: str | Path | None = None,
+        order: Literal["raster", "cell"] = "raster",
+    ):
+        if engine not in ("level", "node"):
+            raise ValueError('engine must be one of ["level", "node"]')
+        if block < 1:
+            raise ValueError("block must be a positive integer")
+        if isinstance(tile, int):
+            tile = (tile, tile)
+        if tile is not None and min(tile) < 1:
+            raise ValueError("tile must be a positive integer or tuple")
+        if dtype not in ("float64", "float32"):
+            raise ValueError('dtype must be one of ["float64", "float32"]')
+        if dtmode not in ("site", "node"):
+            raise ValueError('dtmode must be one of ["site", "node"]')
+        if prune is not None and prune < 0:
+            raise ValueError("prune must be None or a non-negative integer")
+        if order not in ("raster", "cell"):
+            raise ValueError('order must be one of ["raster", "cell"]')
         self.g = 9.80665  # Gravitational acceleration [m/s2]
+        self.engine = engine
+        self.block = block
+        self.tile = tile
+        self.dtype = dtype
+        self.prune = prune
+        self.warm = warm
+        self.dtmode = dtmode
+        if jit and njit is None:
+            warnings.warn(
+                "numba is not installed, the NumPy path is used instead of jit",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+        self.jit = jit and njit is not None
+        self.cache = cache
+        self.order = order
+        # to open the same files again in worker processes
+        self.files = (geop, sa, pl)
         self.geop = nc.Dataset(geop)
         self.sa = nc.Dataset(sa)
         self.pl = nc.Dataset(pl)
@@ -800,9 +1658,22 @@ class DownScaling(object):
             ds_dem = xr.open_dataset(dem)
             self.lons = ds_dem["lon"].values
             self.lats = ds_dem["lat"].values
-            self.ele = ds_dem["elevation"][0].values
+            # read lazily, window by window in demGrid()
+            self._ele = ds_dem["elevation"][0]
+
+    @property
+    def ele(self):
+        """Elevation of the dem formatted in [lat, lon], read entirely from
+        the file at each access. The downscaling itself only reads the
+        windows of the dem, see demGrid()."""
+        return self._ele.values
 
-    def demGrid(self, stations: dict | None = None):
+    def demGrid(
+        self,
+        stations: dict | None = None,
+        window: tuple | None = None,
+        grid: bool = False,
+    ):
         """Return metadata of given stations or dem.
 
         Parameters
@@ -811,10 +1682,18 @@ class DownScaling(object):
             A list of dictionaries describing stations, with keys ["lat", "lon",
             "ele", "name"]. If not given, metadata derived from given dem.
              Default is None.
+        window : tuple of slices, optional
+            (rows, cols) window of the dem to return, see demTiles(). Default
+            is None, the whole dem.
+        grid : bool, optional
+            Return the dem as GridSites, which only keeps the lat/lon axes
+            and the geopotential raster, instead of the [site, 3] array of
+            the raveled grid. lats and lons are then the axes of the grid.
+            Default is False.
 
         Returns
         -------
-        out_xyz_dem: np.array
+        out_xyz_dem: np.array or GridSites
             Metadata [lat, lon, geop] of input dem or sites
         lons: np.array
             Longitude of input sites
@@ -838,10 +1717,13 @@ class DownScaling(object):
             return siteLocation, lats, lons, shape, names
 
         # out_xyz based on dem
-        lons = self.lons
-        lats = self.lats
-        geop = self.ele * self.g
+        rows, cols = window or (slice(None), slice(None))
+        lons = self.lons[cols]
+        lats = self.lats[rows]
+        geop = self._ele[rows, cols].values * self.g
         shape = geop.shape
+        if grid:
+            return GridSites(lats, lons, geop), lats, lons, shape
 
         lons, lats = np.meshgrid(lons, lats)
         lons = lons.reshape(lons.size)
@@ -852,6 +1734,23 @@ class DownScaling(object):
 
         return out_xyz_dem, lats, lons, shape
 
+    def demTiles(self):
+        """Yield the windows of the dem downscaled one after another.
+
+        Yields
+        ------
+        rows, cols: slice
+            Window of the dem, covering tile rows and columns (see the tile
+            option of DownScaling), or the whole dem when tile is None.
+        """
+        nrow, ncol = self._ele.shape
+        trow, tcol = self.tile or (nrow, ncol)
+        for row in range(0, nrow, trow):
+            for col in range(0, ncol, tcol):
+                yield slice(row, min(row + trow, nrow)), slice(
+                    col, min(col + tcol, ncol)
+                )
+
     def geoGrid(self):
         """
         Returns original (NO interpolation) coarse gird metadata
@@ -897,35 +1796,266 @@ class DownScaling(object):
         >>> out_xyz_sur = downscaling.surGrid(lats, lons, out_xyz_dem[:,:2])
         """
 
+        out_xy = np.array([lats, lons]).T
+
+        if not (stations is None):
+            lats = [s["lat"] for s in stations]
+            lons = [s["lon"] for s in stations]
+            out_xy = np.asarray([[s["lat"], s["lon"]] for s in stations])
+
+        # only read the coarse cells covering the sites, with a halo of 1
         longitude = self.geop["lon"][:]
         latitude = self.geop["lat"][:]
+        rows = _node_window(_axis_weights(latitude, out_xy[:, 0])[0], len(latitude))
+        cols = _node_window(_axis_weights(longitude, out_xy[:, 1])[0], len(longitude))
         in_v = self.geop["Geopotential"]  # geopotential
         if in_v.ndim == 4:
-            in_v = in_v[0, 0, :, :]
+            in_v = in_v[0, 0, rows, cols]
         elif in_v.ndim == 3:
-            in_v = in_v[0, :, :]
+            in_v = in_v[0, rows, cols]
         fz = RegularGridInterpolator(
-            (latitude, longitude), in_v, "linear", bounds_error=False, fill_value=None
+            (latitude[rows], longitude[cols]),
+            in_v,
+            "linear",
+            bounds_error=False,
+            fill_value=None,
         )
-        out_xy = np.array([lats, lons]).T
-
-        if not (stations is None):
-            lats = [s["lat"] for s in stations]
-            lons = [s["lon"] for s in stations]
-            out_xy = np.asarray([[s["lat"], s["lon"]] for s in stations])
 
         z_interp = fz(out_xy)
         out_xyz_sur = np.array([lats, lons, z_interp]).T
 
         return out_xyz_sur
 
-    def surTa(self, ind_time, out_xyz_sur):
+    def surSites(self, sites):
+        """Return the surface geopotential interpolated to a grid of sites,
+        as surGrid() does for a list of sites.
+
+        Parameters
+        ----------
+        sites : GridSites
+            Grid of sites, as returned by demGrid(grid=True)
+
+        Returns
+        -------
+        out_xyz_sur: GridSites
+            Sites with the geopotential interpolated from the coarse
+            geopotential file
+        """
+        geop = self.geop["Geopotential"]
+        operator = GridOperator(
+            self.geop["lat"][:], self.geop["lon"][:], sites.lats, sites.lons, halo=1
+        )
+        if geop.ndim == 4:
+            geop = geop[(0, 0) + operator.window]
+        else:
+            geop = geop[(0,) + operator.window]
+
+        return GridSites(sites.lats, sites.lons, operator(geop))
+
+    def interpOperators(self, out_xy):
+        """Return bilinear operators from the coarse grids of the pressure
+        level and the 2-metre temperature files to the given sites. The
+        operators only depend on the coarse grids and the sites, so they are
+        built once and reused for every time step. They cover the window of
+        coarse cells around the sites with a halo of 1 cell, and only this
+        window is read from the files.
+
+        Parameters
+        ----------
+        out_xy : np.array or GridSites
+            Sites [lat, lon, ...] to interpolate to.
+
+        Returns
+        -------
+        operators: dict
+            BilinearOperator of the pressure level grid ('pl') and of the
+            2-metre temperature grid ('sa'), or GridOperator for GridSites.
+            Both are the same object when the two files share the same grid.
+        """
+        plLat = self.pl["lat"][:]
+        plLon = self.pl["lon"][:]
+        saLat = self.sa["lat"][:]
+        saLon = self.sa["lon"][:]
+
+        if isinstance(out_xy, GridSites):
+            operator = GridOperator
+            lats, lons = out_xy.lats, out_xy.lons
+        else:
+            operator = BilinearOperator
+            lats, lons = out_xy[:, 0], out_xy[:, 1]
+        pl = operator(plLat, plLon, lats, lons, self.dtype, halo=1)
+        if np.array_equal(plLat, saLat) and np.array_equal(plLon, saLon):
+            sa = pl
+        else:
+            sa = operator(saLat, saLon, lats, lons, self.dtype, halo=1)
+
+        return {"pl": pl, "sa": sa}
+
+    def geometryKey(self, *arrays):
+        """Return the key of the cached geometry of the sites identified by
+        given arrays (e.g. the axes of a dem window), see the cache option.
+
+        The key is a hash of the arrays, of the lat/lon axes of the
+        reanalysis files, of the geopotential and of the dtype.
+        """
+        geop = self.geop["Geopotential"]
+        arrays += (
+            self.pl["lat"][:],
+            self.pl["lon"][:],
+            self.sa["lat"][:],
+            self.sa["lon"][:],
+            self.geop["lat"][:],
+            self.geop["lon"][:],
+            geop[0, 0] if geop.ndim == 4 else geop[0],
+        )
+        digest = hashlib.blake2b(str(np.dtype(self.dtype)).encode(), digest_size=16)
+        for values in arrays:
+            values = np.ascontiguousarray(values)
+            digest.update(str((values.dtype.str, values.shape)).encode())
+            digest.update(values.tobytes())
+
+        return digest.hexdigest()
+
+    def cachedGeometry(self, out_xyz_dem, lats, lons, stations=None, key=()):
+        """Return the interpolated surface geopotential and the bilinear
+        operators of given sites, read from the cache when it holds them.
+
+        Parameters
+        ----------
+        out_xyz_dem : np.array or GridSites
+            Sites [lat, lon, geop], as returned by demGrid()
+        lats, lons : np.array
+            Latitude and longitude of the sites, as returned by demGrid()
+        stations : list of dictionaries, optional
+            Stations of the sites, see surGrid(). Default is None.
+        key : tuple of np.array, optional
+            Arrays identifying the sites, see geometryKey(). The cache is
+            not used without them. Default is ().
+
+        Returns
+        -------
+        out_xyz_sur: np.array or GridSites
+            Surface level sites [lat, lon, geop], see surGrid() and
+            surSites()
+        operators: dict
+            Bilinear operators, see interpOperators()
+        """
+        file = None
+        if self.cache is not None and key:
+            file = Path(self.cache) / ("geometry_%s.npz" % self.geometryKey(*key))
+
+        if file is not None and file.exists():
+            with np.load(file) as cached:
+                z_sur = cached["sur"]
+                operators = {}
+                for name in ("pl", "sa"):
+                    if name + "_window" not in cached:
+                        operators[name] = operators["pl"]  # shared grid
+                        continue
+                    window = cached[name + "_window"]
+                    window = (slice(*window[:2]), slice(*window[2:]))
+                    if name + "_iy" in cached:
+                        operators[name] = GridOperator.fromAxes(
+                            *(
+                                cached[name + suffix]
+                                for suffix in ("_iy", "_wy", "_ix", "_wx")
+                            ),
+                            window,
+                            self.dtype,
+                        )
+                    else:
+                        operators[name] = BilinearOperator.fromStencil(
+                            cached[name + "_index"], cached[name + "_weight"], window
+                        )
+            if isinstance(out_xyz_dem, GridSites):
+                return GridSites(lats, lons, z_sur), operators
+            return np.array([lats, lons, z_sur]).T, operators
+
+        if isinstance(out_xyz_dem, GridSites):
+            out_xyz_sur = self.surSites(out_xyz_dem)
+        else:
+            out_xyz_sur = self.surGrid(lats, lons, stations)
+        operators = self.interpOperators(out_xyz_dem)
+
+        if file is not None:
+            arrays = {"sur": out_xyz_sur[:, 2]}
+            for name, operator in operators.items():
+                if name == "sa" and operator is operators["pl"]:
+                    continue
+                rows, cols = operator.window
+                if isinstance(operator, GridOperator):
+                    for suffix, values in zip(
+                        ("_iy", "_wy", "_ix", "_wx"), operator.axes
+                    ):
+                        arrays[name + suffix] = values
+                else:
+                    arrays[name + "_index"] = operator.index
+                    arrays[name + "_weight"] = operator.weight
+                arrays[name + "_window"] = [
+                    rows.start,
+                    rows.stop,
+                    cols.start,
+                    cols.stop,
+                ]
+            file.parent.mkdir(parents=True, exist_ok=True)
+            # a temporary file of each writer, so that concurrent runs on the
+            # same sites never interleave their writes before the rename
+            temp = tempfile.NamedTemporaryFile(
+                dir=file.parent, suffix=".npz", delete=False
+            )
+            try:
+                with temp:
+                    np.savez(temp, **arrays)
+                # readable as any file created by the user, the temporary
+                # file is only readable by its owner
+                mask = umask(0)
+                umask(mask)
+                chmod(temp.name, 0o666 & ~mask)
+                replace(temp.name, file)
+            except BaseException:
+                remove(temp.name)
+                raise
+
+        return out_xyz_sur, operators
+
+    def nodeGeometry(self, operator):
+        """Return the coarse nodes of the window of a bilinear operator from
+        the pressure level grid, at which dt is evaluated with the "node"
+        dtmode.
+
+        Parameters
+        ----------
+        operator : BilinearOperator
+            Operator from the pressure level grid to the sites
+
+        Returns
+        -------
+        nodes: dict
+            Surface geopotential of the nodes ('ele'), formatted in [node]
+            in the raveled order of the window, and BilinearOperator from
+            the 2-metre temperature grid to the nodes ('sa').
+        """
+        rows, cols = operator.window
+        lons, lats = np.meshgrid(self.pl["lon"][cols], self.pl["lat"][rows])
+        lons = lons.reshape(lons.size)
+        lats = lats.reshape(lats.size)
+        ele = self.surGrid(lats, lons, None)[:, 2]
+        sa = BilinearOperator(
+            self.sa["lat"][:], self.sa["lon"][:], lats, lons, self.dtype, halo=1
+        )
+
+        return {"ele": ele.astype(self.dtype), "sa": sa}
+
+    def surTa(self, ind_time, out_xyz_sur, operator=None):
         """Return interpolated 2-metre temperature.
 
         Args:
             ind_time: Time need to be interpolated. Time is in interger (e.g.
-            0, 1, 2)
+            0, 1, 2), or a slice or an array of intergers for a block of
+            time steps, in which case t_sa is formated in [time, site]
             out_xyz_sur:
+            operator: BilinearOperator from the 2-metre temperature grid to
+                out_xyz_sur. It is built when not given.
 
         Returns:
             t_sa: interpolation fine-scale surface air temperatue based on
@@ -946,38 +2076,63 @@ class DownScaling(object):
             surTa = downscaling.surTa(0, out_xyz_sur)
         """
 
-        in_v = self.sa["2 metre temperature"]  # geopotential
-        if in_v.ndim == 4:
-            in_v = in_v[ind_time, 0, :, :]
-        elif in_v.ndim == 3:
-            in_v = in_v[ind_time, :, :]
+        if operator is None:
+            lat = self.sa.variables["lat"][:]
+            lon = self.sa.variables["lon"][:]
+            operator = BilinearOperator(
+                lat, lon, out_xyz_sur[:, 0], out_xyz_sur[:, 1], self.dtype, halo=1
+            )
+
+        # only the window of the operator is read
+        in_v = self.saValue(ind_time, operator.window)
         in_v -= 273.15
-        lat = self.sa.variables["lat"][:]
-        lon = self.sa.variables["lon"][:]
 
-        f_sa = RegularGridInterpolator(
-            (lat, lon), in_v, "linear", bounds_error=False, fill_value=None
-        )
-        t_sa = f_sa(out_xyz_sur[:, :2])
+        t_sa = operator(in_v)
 
         return t_sa
 
-    def gridValue(self, variable, ind_time):
+    def saValue(self, ind_time, window):
+        """Return original grid 2-metre temperature.
+
+        Args:
+            ind_time: Time need to be read, an interger, a slice or an array
+                of intergers
+            window: (rows, cols) window of the grid to read
+
+        Returns:
+            Grid 2-metre temperature [K] formated in [lat, lon], or in
+            [time, lat, lon] for a block of time steps
+        """
+        in_v = self.sa["2 metre temperature"]
+        if in_v.ndim == 4:
+            return _read(in_v, (ind_time, 0) + tuple(window), self.dtype)
+        return _read(in_v, (ind_time,) + tuple(window), self.dtype)
+
+    def gridValue(self, variable, ind_time, ele=None, window=None):
         """
         Return original grid temperatures and geopotential of differnet
         pressure levels. The function are called by inLevelInterp() to
         get the input ERA-Interim values.
 
         Args:
-            variable: Given interpolated climate variable
+            variable: Given interpolated climate variable, or a list of
+            variables read with the same geopotential
             ind_time: Time need to be interpolated. Time is in interger (e.g.
-            0, 1, 2)
+            0, 1, 2), or a slice or an array of intergers to read a block of
+            time steps at once
+            ele: Geopotential of the sites to interpolate to. When given
+            and prune is set, only the levels of levelWindow() are read.
+            window: (rows, cols) window of the grid to read, e.g. the window
+            of a BilinearOperator. Default is None, the whole grid.
 
         Returns:
             gridT: Grid temperatures of different pressure levels. Retruned
-            temperature are formated in [level, lat, lon]
+            temperature are formated in [level, lat, lon], or in
+            [time, level, lat, lon] for a block of time steps, preceded by
+            [variable] for a list of variables
             gridZ: Grid geopotential of different pressure levels. Retruned
-            temperature are formated in [level, lat, lon]
+            temperature are formated in [level, lat, lon], or in
+            [time, level, lat, lon] for a block of time steps
             gridLon: Grid longitude of pressure level variables
             gridLat: Grid latitude of pressure level variables
 
@@ -986,16 +2141,87 @@ class DownScaling(object):
 
         """
 
-        gridT = self.pl.variables[variable][ind_time, :, :, :]
-        gridZ = self.pl.variables["Geopotential"][ind_time, :, :, :]
+        rows, cols = window or (slice(None), slice(None))
+        index = (ind_time, slice(None), rows, cols)
+        gridZ = _read(self.pl.variables["Geopotential"], index, self.dtype)
+        if self.prune is not None and ele is not None:
+            levels = self.levelWindow(gridZ, ele)
+            gridZ = gridZ[..., levels, :, :]
+            index = (ind_time, levels, rows, cols)
+        if isinstance(variable, str):
+            gridT = _read(self.pl.variables[variable], index, self.dtype)
+        else:
+            gridT = np.stack(
+                [_read(self.pl.variables[v], index, self.dtype) for v in variable]
+            )
         # x and y
 
-        gridLat = self.pl["lat"][:]
-        gridLon = self.pl["lon"][:]
+        gridLat = self.pl["lat"][rows]
+        gridLon = self.pl["lon"][cols]
 
         return gridT, gridZ, gridLat, gridLon
 
-    def inLevelInterp(self, gridT, gridZ, gridLat, gridLon, out_xyz):
+    def offset(self, variable):
+        """Return the offset subtracted from the interpolated values of a
+        pressure level variable: 273.15 for temperatures in Kelvin, which
+        are returned in Celsius, and 0 for other units. Variables without
+        units attribute are taken as temperatures in Kelvin.
+
+        Args:
+            variable: Pressure level variable, or a list of variables
+
+        Returns:
+            Offset of the variable, or offsets [variable] of a list of
+            variables in the dtype of the computation
+        """
+        if not isinstance(variable, str):
+            return np.array([self.offset(v) for v in variable], self.dtype)
+        units = getattr(self.pl.variables[variable], "units", "K")
+
+        return 273.15 if units in ("K", "kelvin", "Kelvin") else 0.0
+
+    def levelWindow(self, gridZ, ele):
+        """Return the pressure levels that can bracket given sites.
+
+        The geopotential of a site at a level is a weighted mean of the
+        geopotential of the coarse nodes at that level, so a level whose
+        highest node lies below the lowest site is below all sites, and a
+        level whose lowest node lies above the highest site is above all of
+        them. Only the levels between the highest level below and the lowest
+        level above all sites are needed, extended by prune levels on each
+        side.
+
+        Args:
+            gridZ: Grid geopotential of different pressure levels formated in
+                [level, lat, lon] or [time, level, lat, lon]
+            ele: Geopotential of the sites
+
+        Returns:
+            levels: Slice of the levels in the order of the file
+        """
+        nlev = gridZ.shape[-3]
+        gridZ = np.moveaxis(np.asarray(gridZ), -3, 0).reshape(nlev, -1)
+        zmin = np.nanmin(gridZ, axis=1)
+        zmax = np.nanmax(gridZ, axis=1)
+        # levels in ascending elevation
+        descending = zmin[0] > zmin[-1]
+        if descending:
+            zmin, zmax = zmin[::-1], zmax[::-1]
+
+        below = np.flatnonzero(zmax < np.nanmin(ele))
+        above = np.flatnonzero(zmin >= np.nanmax(ele))
+        upper = above[0] if above.size else nlev - 1
+        lower = min(below[-1] if below.size else 0, upper - 1)
+        lower = max(lower - self.prune, 0)
+        upper = min(upper + self.prune, nlev - 1)
+
+        if descending:
+            lower, upper = nlev - 1 - upper, nlev - 1 - lower
+        return slice(lower, upper + 1)
+
+    def inLevelInterp(
+        self, gridT, gridZ, gridLat, gridLon, out_xyz, operator=None, offset=273.15
+    ):
         """
         This is a 2D interpolatation, and returns interpolated temperatures
         of different pressure levels.
@@ -1008,6 +2234,11 @@ class DownScaling(object):
             gridLat: Grid longitude of pressure level variables
             gridLon: Grid latitude of pressure level variables
             out_xyz: Given sites, which will be interpolated.
+            operator: BilinearOperator from the grid to out_xyz. It is built
+                when not given.
+            offset: Offset subtracted from the interpolated temperatures, or
+                offsets [variable] of gridT of several variables, see
+                offset(). Default is 273.15.
 
         Returns:
             t_interp: Interpolated temperatre of different pressure levels.
@@ -1033,33 +2264,19 @@ class DownScaling(object):
                                                            out_xyz_dem)
         """
 
-        shape = gridT.shape
-        # create array to hold interpolation resultes
-        t_interp = np.zeros([shape[0], len(out_xyz)])
-        z_interp = np.zeros([shape[0], len(out_xyz)])
-
-        # temperatue and elevation interpolation 2d
-        for i in range(shape[0]):
-            ft = RegularGridInterpolator(
-                (gridLat, gridLon),
-                gridT[i, :, :],
-                "linear",
-                bounds_error=False,
-                fill_value=None,
+        if operator is None:
+            operator = BilinearOperator(
+                gridLat, gridLon, out_xyz[:, 0], out_xyz[:, 1], self.dtype
             )
-            fz = RegularGridInterpolator(
-                (gridLat, gridLon),
-                gridZ[i, :, :],
-                "linear",
-                bounds_error=False,
-                fill_value=None,
-            )
-            t_interp[i, :] = ft(out_xyz[:, :2])  # temperature
-            z_interp[i, :] = fz(out_xyz[:, :2])  # elevation
 
-        t_interp -= 273.15
+        # temperatue and elevation interpolation 2d, all levels at once,
+        # with levels reversed to ascending elevation
+        t_interp = operator(np.asarray(gridT)[..., ::-1, :, :])  # temperature
+        z_interp = operator(np.asarray(gridZ)[..., ::-1, :, :])  # elevation
+
+        t_interp -= _leading(offset, t_interp)
 
-        return t_interp[::-1, :], z_interp[::-1, :]
+        return t_interp, z_interp
 
     def fast1d(self, t_interp, z_interp, out_xyz):
         """This is a 1D interpoation. The function return interpolated
@@ -1098,44 +2315,102 @@ class DownScaling(object):
             pl_obs = fast1d(t_interp, z_interp, out_xyz_dem)
         """
 
-        ele = out_xyz[:, 2]
-        size = np.arange(out_xyz.shape[0])
-        n = [bisect_left(z_interp[:, i], ele[i]) for i in size]
-        n = [x + 1 if x == 0 else x for x in n]
+        return _vertical_interp(t_interp, z_interp, out_xyz[:, 2])
 
-        lowN = [l - 1 for l in n]
+    def nodeInterp(self, gridT, gridZ, ele, operator, state=None, offset=273.15):
+        """Returns upper-air temperature by the "node" engine: the vertical
+        profiles are only evaluated at the 4 coarse nodes surrounding each
+        site, at the site elevation, and then blended with the bilinear
+        weights of the site.
 
-        upperT = t_interp[n, size]
-        upperZ = z_interp[n, size]
-        dG = upperT - t_interp[lowN, size]  # <0
-        dG /= upperZ - z_interp[lowN, size]  # <0
-        dG *= out_xyz[:, 2] - upperZ  # >0
-        dG += upperT
+        The "level" engine interpolates the profile horizontally first, so
+        the two engines differ by sum(w_k * (G_k - G) * (z - Z_k)) where w_k
+        are the bilinear weights, G_k the lapse rates of the nodes, G their
+        weighted mean and Z_k the node geopotential at the level of the site.
+        For sites inside the coarse grid the deviation is thus bounded by
+        max|G_k - G| * max|Z_k - Z|, the product of the spread of lapse rates
+        and of level heights among the 4 nodes, and it vanishes where either
+        is uniform. Use deviation(..., engine="node") to measure it on given
+        data.
+
+        Args:
+            gridT: Grid temperatures of different pressure levels formated in
+                [level, lat, lon] or [time, level, lat, lon]
+            gridZ: Grid geopotential of different pressure levels formated in
+                [level, lat, lon] or [time, level, lat, lon]
+            ele: Geopotential of the sites formated in [site] or [..., site]
+            operator: BilinearOperator from the grid to the sites
+            state: Dictionary keeping the level brackets between calls to
+                warm-start their search, see _vertical_interp()
+            offset: Offset subtracted from the temperatures, see
+                inLevelInterp(). Default is 273.15.
+
+        Returns:
+            Upper-air temperature at given sites, formated in the shape of ele
+            preceded by [time] for a block of time steps, and by [variable]
+            for several variables.
+
+        Example:
+            gridT, gridZ, gridLat, gridLon = downscaling.gridValue(variable, 0)
+            pl_obs = downscaling.nodeInterp(gridT, gridZ, out_xyz_dem[:, 2],
+                                            operators['pl'])
+        """
+        t_node = np.asarray(gridT).reshape(gridT.shape[:-2] + (-1,))[..., ::-1, :]
+        t_node = t_node - _leading(offset, t_node)
+        z_node = np.asarray(gridZ).reshape(gridZ.shape[:-2] + (-1,))[..., ::-1, :]
 
-        return dG
+        # profiles of the 4 surrounding nodes evaluated at site elevation
+        ele = np.asarray(ele)[..., None, :]
+        values = _vertical_interp(t_node, z_node, ele, operator.index.T, state)
 
-    def interpAll(self, variable, ind_time, out_xyz_sur, out_xyz_obs):
+        return (values * operator.weight.T).sum(axis=-2)
+
+    def interpAll(
+        self,
+        variable,
+        ind_time,
+        out_xyz_sur,
+        out_xyz_obs,
+        operators=None,
+        surface=True,
+    ):
         """Returns all needed interpolated temperatures at given time.
 
         Parameters
         ----------
-        variable: str
-            Interpolated climated variable
-        ind_time: int
-            Time need to be interpolated. Time is in interger (e.g. 0, 1, 2)
+        variable: str or list of str
+            Interpolated climated variable, or a list of variables sharing the
+            read of the geopotential, the level brackets and the stencils.
+            Values of other units than Kelvin are returned as they are (see
+            offset()), and dt is only meaningful for temperatures.
+        ind_time: int, slice or np.array
+            Time need to be interpolated. Time is in interger (e.g. 0, 1, 2),
+            or a slice or an array of intergers for a block of time steps.
         out_xyz_sur: np.array
             Interploated sites[lat, lon, geop], in which the geopotential are
             interpolated from ERA-Interim geopotential file.
         out_xyz_obs: np.array
             Interploated sites[lat, lon, geop], in which the geopotential are
             gotten from DEM.
+        operators: dict, optional
+            Bilinear operators returned by interpOperators(). They are built
+            when not given. With the warm option, the level brackets of the
+            last time step are kept in it.
+        surface: bool, optional
+            Include the 2-metre temperature in dt. When False, dt is only
+            minus the upper-air temperature at surface level, and the
+            2-metre temperature is left to be added, e.g. from its time mean
+            given by surTaMean(). Default is True.
 
         Returns
         -------
         pl_obs: np.array
             Interpolated upper-air temperature at given sites with dem level
-        pl_sur: np.array
-            Interpolated upper-air temperature at given sites with surface level
+        dt: np.array
+            Land surface influence at given sites, i.e. the difference of
+            2-metre temperature and upper-air temperature at surface level.
+            Both are formatted in [site], or [time, site] for a block of time
+            steps, preceded by [variable] for a list of variables.
 
         Example
         -------
@@ -1145,43 +2420,731 @@ class DownScaling(object):
         >>>     variable, ind_time, out_xyz_sur, out_xyz_dem
         >>> )
         """
-        gridT, gridZ, gridLat, gridLon = self.gridValue(variable, ind_time)
-        t_interp, z_interp = self.inLevelInterp(
-            gridT, gridZ, gridLat, gridLon, out_xyz_obs
+        if operators is None:
+            operators = self.interpOperators(out_xyz_obs)
+        window = operators["pl"].window
+        if self.jit and self.engine == "level" and self.dtmode == "site":
+            return self.fusedInterp(
+                variable, ind_time, out_xyz_sur, out_xyz_obs, operators, surface
+            )
+
+        if self.dtmode == "node":
+            # upper-air temperature at dem level, dt at the coarse nodes
+            if "node" not in operators:
+                operators["node"] = self.nodeGeometry(operators["pl"])
+            nodes = operators["node"]
+            ele = out_xyz_obs[:, 2][None].astype(self.dtype)
+            levels = np.concatenate([ele[0], nodes["ele"]])
+        else:
+            # upper-air temperature at surface and dem level, sharing one search
+            ele = np.stack([out_xyz_sur[:, 2], out_xyz_obs[:, 2]]).astype(
+                self.dtype, copy=False
+            )
+            levels = ele
+        gridT, gridZ, gridLat, gridLon = self.gridValue(
+            variable, ind_time, levels, window
         )
-        pl_sur = self.fast1d(t_interp, z_interp, out_xyz_sur)
-        pl_obs = self.fast1d(t_interp, z_interp, out_xyz_obs)
-        t_sa = self.surTa(ind_time, out_xyz_sur)
+        offset = self.offset(variable)
+        state = operators if self.warm else None
+        if self.engine == "node":
+            pl = self.nodeInterp(gridT, gridZ, ele, operators["pl"], state, offset)
+        else:
+            t_interp, z_interp = self.inLevelInterp(
+                gridT, gridZ, gridLat, gridLon, out_xyz_obs, operators["pl"], offset
+            )
+            pl = _vertical_interp(t_interp, z_interp, ele, state=state)
+        if self.dtmode == "node":
+            return pl[..., 0, :], self.nodeDT(
+                ind_time, gridT, gridZ, operators, surface, offset
+            )
+
+        pl_sur = pl[..., 0, :]
+        pl_obs = pl[..., 1, :]
+        if not surface:
+            return pl_obs, -pl_sur
+        t_sa = self.surTa(ind_time, out_xyz_sur, operators["sa"])
         dt = t_sa - pl_sur
 
         return pl_obs, dt
 
-    def spatial_pl_dt(
-        self,
-        variable: str,
-        daterange: dict,
-        types: Literal["ts", "mean"] = "mean",
+    def fusedInterp(
+        self, variable, ind_time, out_xyz_sur, out_xyz_obs, operators, surface=True
     ):
-        """Return the MEAN upper-air temperature and land surface influence
-        during given date range and at given area
+        """Returns the same as interpAll() with the "level" engine, computed
+        by the compiled kernel of the jit option."""
+        ele = np.stack([out_xyz_sur[:, 2], out_xyz_obs[:, 2]]).astype(self.dtype)
+        pl = operators["pl"]
+        sa = operators["sa"]
+        gridT, gridZ, _, _ = self.gridValue(variable, ind_time, ele, pl.window)
+        batch = gridZ.shape[:-3]
+        nlev = gridZ.shape[-3]
+        variables = [variable] if isinstance(variable, str) else list(variable)
+        gridZ = np.ascontiguousarray(gridZ, self.dtype).reshape(
+            (-1, nlev, pl.shape[0] * pl.shape[1])
+        )
+        gridT = np.ascontiguousarray(gridT, self.dtype).reshape(
+            (len(variables),) + gridZ.shape
+        )
+        if surface:
+            gridSa = self.saValue(ind_time, sa.window)
+            gridSa -= 273.15  # as in surTa()
+            gridSa = np.ascontiguousarray(gridSa, self.dtype)
+            gridSa = gridSa.reshape((-1, sa.shape[0] * sa.shape[1]))
+        else:
+            gridSa = np.empty((0, 0), self.dtype)
+
+        out = np.empty((2, len(variables), gridZ.shape[0], ele.shape[1]), self.dtype)
+        _fused_interp(
+            gridT,
+            gridZ,
+            gridSa,
+            pl.index,
+            pl.weight,
+            sa.index,
+            sa.weight,
+            ele,
+            self.offset(variables),
+            out,
+            operators.get("cells", np.empty(0, np.intp)),
+        )
+        if isinstance(variable, str):
+            out = out[:, 0]
+        out = out.reshape(out.shape[:-2] + batch + (ele.shape[1],))
+
+        return out[0], out[1]
+
+    def nodeDT(self, ind_time, gridT, gridZ, operators, surface=True, offset=273.15):
+        """Returns the land surface influence evaluated at the coarse nodes
+        and interpolated to the sites, see the "node" dtmode.
 
         Parameters
         ----------
-        variable : str
-            Climated variable to interpolate
-        daterange : dict
-            Date range to interpolate with keys 'beg' and 'end'
-        types : Literal["ts", "mean"], optional
-            Type of output, by default "mean"
+        ind_time: int, slice or np.array
+            Time steps of gridT and gridZ
+        gridT, gridZ: np.array
+            Temperature and geopotential of the pressure levels on the window
+            of operators['pl'], as returned by gridValue()
+        operators: dict
+            Bilinear operators returned by interpOperators(), with the nodes
+            returned by nodeGeometry() under 'node'
+        surface: bool, optional
+            Include the 2-metre temperature, see interpAll(). Default is True.
+        offset: float or np.array, optional
+            Offset subtracted from the temperatures, see inLevelInterp().
+            Default is 273.15.
 
         Returns
         -------
-        pl: np.array
-            Interpolated MEAN free-atmosphere during given date range and at
-            given area.
         dt: np.array
-            Interpolated MEAN surface level land surface influences during given
-            date range and at given area.
+            Land surface influence at the sites, formatted in [site] or
+            [time, site], preceded by [variable] for several variables
+        """
+        operator = operators["pl"]
+        nodes = operators["node"]
+        t_node = np.asarray(gridT).reshape(gridT.shape[:-2] + (-1,))[..., ::-1, :]
+        t_node = t_node - _leading(offset, t_node)
+        z_node = np.asarray(gridZ).reshape(gridZ.shape[:-2] + (-1,))[..., ::-1, :]
+        dt = -_vertical_interp(t_node, z_node, nodes["ele"])
+        if surface:
+            dt += self.surTa(ind_time, None, nodes["sa"])
+
+        return operator(dt.reshape(dt.shape[:-1] + operator.shape))
+
+    def surTaMean(self, ind_time_vec, operator):
+        """Return the mean 2-metre temperature of given time steps at the
+        sites of a bilinear operator.
+
+        Bilinear interpolation is linear, so the interpolated mean equals
+        the mean of the interpolated fields. The time steps are thus
+        averaged on the coarse window of the operator, block by block, and
+        interpolated once.
+
+        Args:
+            ind_time_vec: Index of the time steps, as returned by timeIndex()
+            operator: BilinearOperator from the 2-metre temperature grid to
+                the sites, e.g. interpOperators(out_xyz_dem)['sa']
+
+        Returns:
+            t_sa: Mean 2-metre temperature at the sites
+        """
+        bounds = np.array([[0, ind_time_vec.size]])
+
+        return self.surTaWindows(ind_time_vec, bounds, operator)[0]
+
+    def surTaWindows(self, ind_time_vec, bounds, operator):
+        """Return the mean 2-metre temperature of several windows of time
+        steps at the sites of a bilinear operator, reading each time step
+        once (see surTaMean()).
+
+        Args:
+            ind_time_vec: Index of the time steps, as returned by timeIndex()
+            bounds: Bounds [window, 2] of the windows in positions of
+                ind_time_vec, the end excluded, see spatialWindows()
+            operator: BilinearOperator from the 2-metre temperature grid to
+                the sites, e.g. interpOperators(out_xyz_dem)['sa']
+
+        Returns:
+            t_sa: Mean 2-metre temperature at the sites formatted in
+                [window, site]
+        """
+        total = np.zeros((len(bounds),) + operator.shape)
+        for ind_out, ind_time in self.timeBlocks(ind_time_vec):
+            values = np.asarray(self.saValue(ind_time, operator.window))
+            for window, beg, end in _block_segments(bounds, ind_out):
+                total[window] += values[beg:end].sum(axis=0, dtype=np.float64)
+
+        # NaN for windows without time steps
+        with np.errstate(invalid="ignore"):
+            mean = total / (bounds[:, 1] - bounds[:, 0])[:, None, None] - 273.15
+
+        return operator(mean.astype(self.dtype, copy=False))
+
+    def timeIndex(self, daterange):
+        """Return the indices and dates of the time steps within daterange.
+
+        Parameters
+        ----------
+        daterange : dict
+            Date range with keys 'beg' and 'end'
+
+        Returns
+        -------
+        ind_time_vec: np.array
+            Index of the time steps in the pressure level file
+        out_time: np.array
+            Dates of the time steps
+        """
+        beg, end = self.timeBounds(daterange)
+        ind_time_vec = np.arange(beg, end)
+        out_time = nc.num2date(
+            self.pl.variables["time"][beg:end],
+            units="seconds since 1970-1-1",
+            calendar="standard",
+        )
+
+        return ind_time_vec, np.asarray(out_time)
+
+    def timeEpoch(self):
+        """Return the time axis of the pressure level file in integer seconds
+        since 1970-1-1. It is read once and cached, so that date ranges are
+        then found by binary search (see timeBounds()) without converting
+        the whole time axis to dates again."""
+        if getattr(self, "_epoch", None) is None:
+            time = self.pl.variables["time"][:]
+            self._epoch = np.round(np.asarray(time, np.float64)).astype(np.int64)
+
+        return self._epoch
+
+    def timeBounds(self, daterange):
+        """Return the bounds (beg, end) of the time steps within daterange in
+        the pressure level file, the end excluded.
+
+        Parameters
+        ----------
+        daterange : dict
+            Date range with keys 'beg' and 'end', both included
+
+        Returns
+        -------
+        beg, end: int
+            Index of the first time step and of the one after the last
+        """
+        epoch = self.timeEpoch()
+        beg = np.searchsorted(epoch, _epoch(daterange.get("beg")), side="left")
+        end = np.searchsorted(epoch, _epoch(daterange.get("end")), side="right")
+
+        return int(beg), int(max(beg, end))
+
+    def dateWindows(self, windows, daterange=None):
+        """Return the bounds of date windows in the pressure level file.
+
+        Parameters
+        ----------
+        windows : list of dict or str
+            Date ranges with keys 'beg' and 'end', which may overlap, or a
+            calendar grouping of the time steps of daterange into
+            consecutive windows, one of "monthly", "seasonal" (DJF, MAM,
+            JJA and SON, December counted in the next year), "hydrological"
+            (October to September, named by the year it ends) or "annual".
+        daterange : dict, optional
+            Date range grouped by a calendar grouping. Default is None, the
+            whole time axis.
+
+        Returns
+        -------
+        bounds: np.array
+            Bounds [window, 2] of the windows in the pressure level file,
+            the end excluded
+        labels: list of str
+            Names of the windows, e.g. "2016-01", "2016-DJF" or "2016"
+        """
+        if not isinstance(windows, str):
+            bounds = np.array([self.timeBounds(window) for window in windows])
+            labels = [
+                "{}/{}".format(window.get("beg"), window.get("end"))
+                for window in windows
+            ]
+            return bounds.reshape(-1, 2), labels
+
+        if windows not in ("monthly", "seasonal", "hydrological", "annual"):
+            raise ValueError(
+                'windows must be a list of date ranges or one of ["monthly", '
+                '"seasonal", "hydrological", "annual"]'
+            )
+        if daterange is None:
+            beg, end = 0, self.timeEpoch().size
+        else:
+            beg, end = self.timeBounds(daterange)
+        dates = self.timeEpoch()[beg:end].astype("datetime64[s]")
+        year = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        month = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+
+        if windows == "monthly":
+            key = year * 12 + month - 1
+        elif windows == "seasonal":
+            key = (year + (month == 12)) * 4 + month % 12 // 3
+        elif windows == "hydrological":
+            key = year + (month >= 10)
+        else:
+            key = year
+
+        # the time axis is sorted, so that each window is a run of time steps
+        starts = np.flatnonzero(np.diff(key) != 0) + 1
+        starts = np.concatenate([[0], starts]) if key.size else starts
+        ends = np.append(starts[1:], key.size)
+        bounds = np.stack([starts, ends], axis=-1) + beg
+
+        seasons = ("DJF", "MAM", "JJA", "SON")
+        labels = []
+        for k in key[starts]:
+            if windows == "monthly":
+                labels.append("{:04d}-{:02d}".format(k // 12, k % 12 + 1))
+            elif windows == "seasonal":
+                labels.append("{:04d}-{}".format(k // 4, seasons[k % 4]))
+            else:
+                labels.append("{:04d}".format(k))
+
+        return bounds.reshape(-1, 2), labels
+
+    def timeBlocks(self, ind_time_vec):
+        """Split time indices into blocks of self.block time steps.
+
+        Parameters
+        ----------
+        ind_time_vec : np.array
+            Index of the time steps in the pressure level file, as returned
+            by timeIndex()
+
+        Yields
+        ------
+        ind_out: slice
+            Position of the block in ind_time_vec
+        ind_time: slice or np.array
+            Index of the block in the files, a slice when the block is
+            contiguous so that it is read in one hyperslab.
+        """
+        for beg in range(0, ind_time_vec.size, self.block):
+            ind_time = ind_time_vec[beg : beg + self.block]
+            ind_out = slice(beg, beg + ind_time.size)
+            if np.all(np.diff(ind_time) == 1):
+                ind_time = slice(ind_time[0], ind_time[-1] + 1)
+            yield ind_out, ind_time
+
+    def mapBlocks(
+        self, variable, ind_time_vec, reduce, out=None, workers=1, windows=None
+    ):
+        """Downscale blocks of time steps of the tiles of the dem, in a
+        process pool when workers > 1.
+
+        A single pool serves all the tiles of a call: each worker process
+        opens its own read-only handles of the netcdf files once. The
+        geometry of a tile (see spatialGeometry()) is derived once, pickled
+        into a SharedMemory block and loaded by a worker when it receives
+        the first block of the tile. The blocks of consecutive tiles share
+        the pool, so that the workers never wait for the end of a tile.
+        Results are yielded in the order of the tiles and of the blocks
+        whatever the number of workers, so that sums over blocks are
+        bit-for-bit identical for any number of workers. At most 2 blocks
+        per worker are in flight, so that results waiting to be consumed do
+        not pile up in memory.
+
+        Parameters
+        ----------
+        variable : str
+            Climated variable to interpolate
+        ind_time_vec : np.array
+            Index of the time steps to interpolate, as returned by
+            timeIndex()
+        reduce : bool or np.array
+            Yield the sums of pl_obs and dt over the time steps of each block
+            instead of their values. The 2-metre temperature is then left
+            out of dt (see the surface argument of interpAll()). Given as
+            the bounds [window, 2] of windows in positions of ind_time_vec,
+            the sums are taken over the part of each window in the block
+            and stacked in [window, ...] for the windows overlapping the
+            block, see _block_segments().
+        out : np.array or tuple, optional
+            Output formatted in [2, time, lat, lon], or [2, variable, time,
+            lat, lon] for a list of variables, that pl_obs and dt of each
+            block are written into instead of being yielded. With workers > 1
+            it is given as (name, shape, dtype) of a SharedMemory block.
+        workers : int, optional
+            Number of worker processes, by default 1 (no process pool). They
+            are forked, or spawned with the jit option, or once it has been
+            used in the process, as the parallel kernel of numba is not
+            fork-safe: the calling script must then be protected by
+            ``if __name__ == "__main__":``, and the threads of numba are
+            shared out between the workers.
+        windows : iterable of tuple, optional
+            (rows, cols) windows of the dem to downscale. Default is None,
+            the tiles of demTiles().
+
+        Yields
+        ------
+        window: tuple of slices
+            (rows, cols) window of the block in the dem
+        geometry: tuple
+            (out_xyz_sur, out_xyz_dem, operators) of the window, as returned
+            by spatialGeometry()
+        ind_out: slice
+            Position of the block in ind_time_vec
+        result: tuple or None
+            (pl_obs, dt) of the block, or their sums over the block when
+            reduce is True, or None when written into out.
+        """
+        blocks = list(self.timeBlocks(ind_time_vec))
+        if isinstance(reduce, bool):
+            blocks = [
+                (variable, ind_out, ind_time, reduce) for ind_out, ind_time in blocks
+            ]
+        else:
+            blocks = [
+                (variable, ind_out, ind_time, _block_segments(reduce, ind_out))
+                for ind_out, ind_time in blocks
+            ]
+        windows = self.demTiles() if windows is None else windows
+
+        def tasks():
+            for window in windows:
+                geometry, _ = self.spatialGeometry(window)
+                for k, task in enumerate(blocks):
+                    yield window, geometry, k == len(blocks) - 1, task
+
+        if workers <= 1:
+            for window, geometry, _, task in tasks():
+                state = (self, geometry, out, window)
+                yield window, geometry, task[1], _downscale_block(state, *task)
+            return
+
+        options = {
+            key: getattr(self, key)
+            for key in (
+                "engine",
+                "block",
+                "tile",
+                "dtype",
+                "prune",
+                "warm",
+                "dtmode",
+                "jit",
+                "order",
+            )
+        }
+        # the threading layers of numba do not survive a fork
+        context = get_context("spawn") if self.jit or _numba_threads() else None
+        shared = {}  # SharedMemory of the geometry of the tiles in flight
+        pending = deque()
+
+        def result():
+            window, geometry, ind_out, last, future = pending.popleft()
+            values = future.result()
+            if last:  # all the blocks of the tile are done
+                memory = shared.pop(id(geometry))
+                memory.close()
+                memory.unlink()
+            return window, geometry, ind_out, values
+
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.files, options, out, workers),
+        ) as pool:
+            try:
+                for window, geometry, last, task in tasks():
+                    if id(geometry) not in shared:
+                        shared[id(geometry)] = _share_pickle(geometry)
+                    name = shared[id(geometry)].name
+                    future = pool.submit(_run_worker, name, window, task)
+                    pending.append((window, geometry, task[1], last, future))
+                    if len(pending) >= 2 * workers:
+                        yield result()
+                while pending:
+                    yield result()
+            finally:
+                for memory in shared.values():
+                    memory.close()
+                    memory.unlink()
+
+    def spatialGeometry(self, window: tuple | None = None):
+        """Return the sites of the dem and their interpolation stencils.
+
+        Parameters
+        ----------
+        window : tuple of slices, optional
+            (rows, cols) window of the dem, see demTiles(). Default is None,
+            the whole dem.
+
+        Returns
+        -------
+        geometry: tuple
+            (out_xyz_sur, out_xyz_dem, operators) as passed to interpAll()
+        shape: tuple
+            Shape of the window
+        """
+        # Surface level sites to interpolate, kept as a grid
+        out_xyz_dem, lats, lons, shape = self.demGrid(window=window, grid=True)
+        # Topography sites and interpolation stencils, shared by all time
+        # steps and cached when the cache option is set
+        rows, cols = window or (slice(None), slice(None))
+        out_xyz_sur, operators = self.cachedGeometry(
+            out_xyz_dem, lats, lons, key=(self.lats[rows], self.lons[cols])
+        )
+        geometry = (out_xyz_sur, out_xyz_dem, operators)
+        if self.order == "cell":
+            geometry = self.cellOrder(geometry)
+
+        return geometry, shape
+
+    def cellOrder(self, geometry):
+        """Return a geometry with its sites grouped by the coarse cell of the
+        pressure level grid containing them, in raster order of the cells
+        and in raster order within each cell, see the order option.
+
+        Parameters
+        ----------
+        geometry : tuple
+            (out_xyz_sur, out_xyz_dem, operators) of sites in raster order,
+            as returned by spatialGeometry()
+
+        Returns
+        -------
+        geometry: tuple
+            (out_xyz_sur, out_xyz_dem, operators) of the reordered sites.
+            operators holds the raster position of each site under 'order'
+            and the offsets [cell + 1] of the runs of sites sharing a cell
+            under 'cells'. See _raster_order() to scatter values back.
+        """
+        out_xyz_sur, out_xyz_dem, operators = geometry
+        pl = operators["pl"]
+        # the upper-left node identifies the cell
+        corner = pl.index[:, 0]
+        order = np.argsort(corner, kind="stable")
+        corner = corner[order]
+        cells = np.concatenate(
+            [[0], np.flatnonzero(corner[1:] != corner[:-1]) + 1, [corner.size]]
+        )
+
+        reordered = {
+            "pl": BilinearOperator.fromStencil(
+                pl.index[order], pl.weight[order], pl.window
+            )
+        }
+        sa = operators["sa"]
+        if sa is pl:
+            reordered["sa"] = reordered["pl"]
+        else:
+            reordered["sa"] = BilinearOperator.fromStencil(
+                sa.index[order], sa.weight[order], sa.window
+            )
+        reordered["order"] = order
+        reordered["cells"] = cells
+
+        return out_xyz_sur[order, :], out_xyz_dem[order, :], reordered
+
+    def spatialBlocks(self, variable: str | list, daterange: dict, workers: int = 1):
+        """Yield the upper-air temperature and land surface influence of the
+        dem tile by tile (see the tile option of DownScaling) and block of
+        time steps by block of time steps (see the block option), so that a
+        time series can be written out as it is computed with a memory use
+        that depends on neither the date range nor the dem size.
+
+        Parameters
+        ----------
+        variable : str or list of str
+            Climated variable to interpolate, or a list of variables, see
+            interpAll()
+        daterange : dict
+            Date range to interpolate with keys 'beg' and 'end'
+        workers : int, optional
+            Number of worker processes sharing the time loop, by default 1.
+            With the jit option, the calling script must be protected by
+            ``if __name__ == "__main__":``, see mapBlocks().
+
+        Yields
+        ------
+        index: tuple
+            (ind_out, rows, cols) position of the block in the time steps of
+            daterange and in the dem
+        time: np.array
+            Dates of the block
+        pl: np.array
+            Upper-air temperature formatted in [time, lat, lon], preceded by
+            [variable] for a list of variables
+        dt: np.array
+            Land surface influence formatted as pl
+
+        Example
+        -------
+        >>> for index, time, pl, dt in downscaling.spatialBlocks(
+        >>>     variable, daterange
+        >>> ):
+        >>>     ncvar[index] = pl + lscf[index[1:]] * dt
+        """
+        ind_time_vec, out_time = self.timeIndex(daterange)
+
+        print("\nConducting downscaling now, have a cup of coffee please\n")
+
+        for (rows, cols), _, ind_out, (pl_obs, dt) in self.mapBlocks(
+            variable, ind_time_vec, False, workers=workers
+        ):
+            print(*out_time[ind_out], sep="\n")
+            shape = self._ele[rows, cols].shape
+            pl_obs = pl_obs.reshape(pl_obs.shape[:-1] + shape)
+            dt = dt.reshape(dt.shape[:-1] + shape)
+            yield (ind_out, rows, cols), out_time[ind_out], pl_obs, dt
+
+    def spatialWindows(
+        self,
+        variable: str | list,
+        windows: list | str,
+        daterange: dict | None = None,
+        workers: int = 1,
+    ):
+        """Return the MEAN upper-air temperature and land surface influence
+        of many date windows, e.g. the months of 30 years, in a single pass:
+        each time step is read and downscaled once and added to every
+        window it belongs to.
+
+        Parameters
+        ----------
+        variable : str or list of str
+            Climated variable to interpolate, or a list of variables, see
+            interpAll()
+        windows : list of dict or str
+            Date ranges with keys 'beg' and 'end', or a calendar grouping
+            of the time steps of daterange, one of "monthly", "seasonal",
+            "hydrological" or "annual", see dateWindows()
+        daterange : dict, optional
+            Date range grouped by a calendar grouping. Default is None, the
+            whole time axis.
+        workers : int, optional
+            Number of worker processes sharing the time loop, by default 1.
+            With the jit option, the calling script must be protected by
+            ``if __name__ == "__main__":``, see mapBlocks().
+
+        Returns
+        -------
+        pl: np.array
+            Interpolated MEAN free-atmosphere of each window
+        dt: np.array
+            Interpolated MEAN surface level land surface influences of each
+            window. Both are formatted in [window, lat, lon], or [window,
+            variable, lat, lon] for a list of variables.
+        labels: list of str
+            Names of the windows, see dateWindows()
+
+        Example
+        -------
+        >>> pl, dt, months = downscaling.spatialWindows(
+        >>>     "Temperature", "monthly", {"beg": beg, "end": end}
+        >>> )
+        """
+        bounds, labels = self.dateWindows(windows, daterange)
+        # time steps of all the windows, each of them read once
+        ind_time_vec = np.unique(
+            np.concatenate([np.arange(beg, end) for beg, end in bounds] + [[]])
+        ).astype(np.int64)
+        out_time = nc.num2date(
+            self.pl.variables["time"][ind_time_vec],
+            units="seconds since 1970-1-1",
+            calendar="standard",
+        )
+        # bounds in positions of ind_time_vec
+        bounds = np.searchsorted(ind_time_vec, bounds)
+        count = bounds[:, 1] - bounds[:, 0]
+        lead = () if isinstance(variable, str) else (len(variable),)
+        shape = self._ele.shape
+
+        print("\nConducting downscaling now, have a cup of coffee please\n")
+
+        # NaN for empty windows, and everywhere without any time step
+        pl = np.full((len(bounds),) + lead + shape, np.nan)
+        dt = np.full((len(bounds),) + lead + shape, np.nan)
+        tiles = groupby(
+            self.mapBlocks(variable, ind_time_vec, bounds, workers=workers),
+            key=lambda block: block[0],
+        )
+        for (rows, cols), tile_blocks in tiles:
+            tile_shape = self._ele[rows, cols].shape
+            sum_pl_obs = np.zeros((len(bounds),) + lead + (int(np.prod(tile_shape)),))
+            sum_dt = np.zeros(sum_pl_obs.shape)
+            for _, geometry, ind_out, (pl_obs, dt_obs) in tile_blocks:
+                print(*out_time[ind_out], sep="\n")
+                for k, (w, _, _) in enumerate(_block_segments(bounds, ind_out)):
+                    sum_pl_obs[w] += pl_obs[k]
+                    sum_dt[w] += dt_obs[k]
+
+            # the 2-metre temperature is linear, so it is averaged on the
+            # coarse grid and interpolated once per window
+            t_sa = self.surTaWindows(ind_time_vec, bounds, geometry[2]["sa"])
+            t_sa = _raster_order(t_sa, geometry[2])
+            with np.errstate(invalid="ignore"):  # NaN for empty windows
+                for w in range(len(bounds)):
+                    dt_mean = sum_dt[w] / count[w] + t_sa[w]
+                    dt[w][..., rows, cols] = dt_mean.reshape(lead + tile_shape)
+                    pl[w][..., rows, cols] = (sum_pl_obs[w] / count[w]).reshape(
+                        lead + tile_shape
+                    )
+
+        return pl, dt, labels
+
+    def spatial_pl_dt(
+        self,
+        variable: str | list,
+        daterange: dict,
+        types: Literal["ts", "mean"] = "mean",
+        workers: int = 1,
+    ):
+        """Return the MEAN upper-air temperature and land surface influence
+        during given date range and at given area
+
+        Parameters
+        ----------
+        variable : str or list of str
+            Climated variable to interpolate, or a list of variables
+            downscaled in one pass, see interpAll()
+        daterange : dict
+            Date range to interpolate with keys 'beg' and 'end'
+        types : Literal["ts", "mean"], optional
+            Type of output, by default "mean"
+        workers : int, optional
+            Number of worker processes sharing the time loop, by default 1.
+            The output does not depend on the number of workers. On
+            platforms without fork, or with the jit option (see
+            mapBlocks()), the calling script must be protected by
+            ``if __name__ == "__main__":``.
+
+        Returns
+        -------
+        pl: np.array
+            Interpolated MEAN free-atmosphere during given date range and at
+            given area.
+        dt: np.array
+            Interpolated MEAN surface level land surface influences during given
+            date range and at given area.
+            Both are formatted in [lat, lon], or [time, lat, lon] for "ts",
+            preceded by [variable] for a list of variables.
 
         Example
         -------
@@ -1195,58 +3158,44 @@ class DownScaling(object):
         >>> out_xyz_sur = downscaling.surGrid(lats, lons, None)
         >>> pl,dt = downscaling.spatial_pl_dt(variable, daterange, types)
         """
-        # obtain time range
-        date_vec = nc.num2date(
-            self.pl.variables["time"][:],
-            units="seconds since 1970-1-1",
-            calendar="standard",
-        )
+        if types not in ("mean", "ts"):
+            raise ValueError('types must be one of ["mean","ts"]')
 
         # index of time steps to interpolate
-        mask = date_vec >= daterange.get("beg")
-        mask *= date_vec <= daterange.get("end")
-        ind_time_vec = np.arange(len(mask))[mask]
-        out_time = date_vec[mask]
-
-        sum_pl_obs = 0
-        sum_dt = 0
-
-        # Surface level sites to interpolate
-        out_xyz_dem, lats, lons, shape = self.demGrid()
-        # Topography sites to interpolate
-        out_xyz_sur = self.surGrid(lats, lons, None)
-
-        print("\nConducting downscaling now, have a cup of coffee please\n")
+        ind_time_vec, out_time = self.timeIndex(daterange)
+        lead = () if isinstance(variable, str) else (len(variable),)
+        shape = self._ele.shape
 
         if types == "mean":
-            for ind_out, ind_time in enumerate(ind_time_vec):
-                print((out_time[ind_out]))
-                pl_obs, dt = self.interpAll(
-                    variable, ind_time, out_xyz_sur, out_xyz_dem
-                )
-                sum_pl_obs += pl_obs
-                sum_dt += dt
-
-            dt = sum_dt / out_time.size
-            pl = sum_pl_obs / out_time.size
-
-            dt = dt.reshape(shape)
-            pl = pl.reshape(shape)
-        elif types == "ts":
-            dt = []
-            pl = []
-            for ind_out, ind_time in enumerate(ind_time_vec):
-                print((out_time[ind_out]))
-                pl_obs, dt_ = self.interpAll(
-                    variable, ind_time, out_xyz_sur, out_xyz_dem
-                )
-                dt.append(dt_.reshape(shape))
-                pl.append(pl_obs.reshape(shape))
-            dt = np.array(dt)
-            pl = np.array(pl)
-
+            # a single window, see spatialWindows()
+            pl, dt, _ = self.spatialWindows(variable, [daterange], workers=workers)
+            pl, dt = pl[0], dt[0]
         else:
-            raise ValueError('types must be one of ["mean","ts"]')
+            print("\nConducting downscaling now, have a cup of coffee please\n")
+
+            out_shape = (2,) + lead + (out_time.size,) + shape
+            if workers > 1:
+                size = np.dtype(self.dtype).itemsize * int(np.prod(out_shape))
+                memory = SharedMemory(create=True, size=size)
+                out = (memory.name, out_shape, self.dtype)
+                values = np.ndarray(out_shape, self.dtype, buffer=memory.buf)
+            else:
+                out = values = np.empty(out_shape, self.dtype)
+
+            try:
+                for _, _, ind_out, _ in self.mapBlocks(
+                    variable, ind_time_vec, False, out, workers
+                ):
+                    print(*out_time[ind_out], sep="\n")
+                pl = values[0]
+                dt = values[1]
+                if workers > 1:
+                    pl, dt = pl.copy(), dt.copy()
+            finally:
+                if workers > 1:
+                    del values
+                    memory.close()
+                    memory.unlink()
 
         return pl, dt, out_time
 
@@ -1255,13 +3204,15 @@ class DownScaling(object):
         at given time steps
 
         Args:
-            variable: Climated variable to interpolate
+            variable: Climated variable to interpolate, or a list of
+                variables, see interpAll()
             daterange: Date range to interpolate
-            out_xyz_sur: Surface level sites to interpolate
-            out_xyz_obs: Topography sites to interpolate
+            stations: Stations to interpolate, see demGrid()
 
         Returns:
             out_valu: interpolated upper-air temperature & land-surface effects
+                formatted in [time, station], preceded by [variable] for a
+                list of variables
             out_time: time series
 
         Example:
@@ -1277,35 +3228,109 @@ class DownScaling(object):
                                                                     out_xyz_dem)
         """
 
-        # obtain time range
-        date_vec = nc.num2date(
-            self.pl.variables["time"][:],
-            units="seconds since 1970-1-1",
-            calendar="standard",
-        )
-
         # obtain station information
         out_xyz_dem, lats, lons, shape, names = self.demGrid(stations)
-        out_xyz_sur = self.surGrid(lats, lons, stations)
+        out_xyz_sur, operators = self.cachedGeometry(
+            out_xyz_dem, lats, lons, stations, key=(out_xyz_dem[:, :2],)
+        )
 
         # index of time steps to interpolate
-        mask = date_vec >= daterange.get("beg")
-        mask *= date_vec <= daterange.get("end")
-        ind_time_vec = np.arange(len(mask))[mask]
-        out_time = date_vec[mask]
+        ind_time_vec, out_time = self.timeIndex(daterange)
 
-        out_valu = np.zeros((2, ind_time_vec.size, out_xyz_dem.shape[0]))  # pl_obs, dt
+        lead = () if isinstance(variable, str) else (len(variable),)
+        out_valu = np.zeros(
+            (2,) + lead + (ind_time_vec.size, out_xyz_dem.shape[0])
+        )  # pl_obs, dt
 
         print("\nConducting downscaling now, have a cup of coffee please\n")
 
-        for ind_out, ind_time in enumerate(ind_time_vec):
-            print((out_time[ind_out]))
-            out_valu[:, ind_out, :] = self.interpAll(
-                variable, ind_time, out_xyz_sur, out_xyz_dem
+        for ind_out, ind_time in self.timeBlocks(ind_time_vec):
+            print(*out_time[ind_out], sep="\n")
+            out_valu[..., ind_out, :] = self.interpAll(
+                variable, ind_time, out_xyz_sur, out_xyz_dem, operators
             )
 
         return out_valu[0], out_valu[1], out_time, names
 
+    def deviation(self, variable, daterange, samples=5, **options):
+        """Returns the deviation of an alternative configuration from the
+        current one, evaluated over the dem on a sample of time steps.
+
+        Parameters
+        ----------
+        variable : str
+            Climated variable to interpolate
+        daterange : dict
+            Date range to sample time steps from, with keys 'beg' and 'end'
+        samples : int, optional
+            Number of time steps evenly spread over daterange, by default 5
+        **options
+            DownScaling attributes of the alternative configuration, e.g.
+            engine="node".
+
+        Returns
+        -------
+        deviation: dict
+            Maximum and root mean square deviation of the upper-air
+            temperature ('pl') and of the land surface influence ('dt'), and
+            the time spent per time step by both configurations ('time'),
+            formatted as {'pl': (max, rms), 'dt': (max, rms),
+            'time': (current, alternative)}.
+
+        Example
+        -------
+        >>> downscaling = DownScaling(geop, sa, pl, dem)
+        >>> downscaling.deviation('Temperature', daterange, engine='node')
+        >>> downscaling.deviation('Temperature', daterange, dtype='float32')
+        """
+        ind_time_vec, out_time = self.timeIndex(daterange)
+        pick = np.unique(np.linspace(0, ind_time_vec.size - 1, samples).astype(int))
+
+        default = {key: getattr(self, key) for key in options}
+
+        def alternative(func, *args):
+            try:
+                for key, value in options.items():
+                    setattr(self, key, value)
+                return func(*args)
+            finally:
+                for key, value in default.items():
+                    setattr(self, key, value)
+
+        stats = {key: [0.0, 0.0, 0] for key in ("pl", "dt")}  # max, sum sq, count
+        elapsed = [0.0, 0.0]
+        for window in self.demTiles():
+            ref_geometry, _ = self.spatialGeometry(window)
+            alt_geometry, _ = alternative(self.spatialGeometry, window)
+            for ind_time in ind_time_vec[pick]:
+                tic = perf_counter()
+                ref = self.interpAll(variable, ind_time, *ref_geometry)
+                toc = perf_counter()
+                alt = alternative(self.interpAll, variable, ind_time, *alt_geometry)
+                elapsed[0] += toc - tic
+                elapsed[1] += perf_counter() - toc
+                for key, a, r in zip(("pl", "dt"), alt, ref):
+                    a = _raster_order(a, alt_geometry[2])
+                    r = _raster_order(r, ref_geometry[2])
+                    values = np.abs(a - r)
+                    values = values[~np.isnan(values)]
+                    if values.size:
+                        stats[key][0] = max(stats[key][0], values.max())
+                    stats[key][1] += np.sum(values**2)
+                    stats[key][2] += values.size
+
+        deviation = {}
+        for key, (vmax, sumsq, count) in stats.items():
+            deviation[key] = (vmax, np.sqrt(sumsq / count) if count else np.nan)
+            print(
+                "%s: max deviation %.3g, rms deviation %.3g"
+                % (key, deviation[key][0], deviation[key][1])
+            )
+        deviation["time"] = tuple(t / pick.size for t in elapsed)
+        print("time per step: %.4f s, alternative %.4f s" % deviation["time"])
+
+        return deviation
+
     def extractStationAirTCSV(
         self, daterange, variable, stations, stat_out1, stat_out2
     ):
@@ -1396,7 +3421,7 @@ class DownScaling(object):
 
         # temperature and coarse land-surface effects
         pl, dt, _ = self.spatial_pl_dt(variable, daterange)
-        shape = self.ele.shape
+        shape = self._ele.shape
 
         # create nc file
         nc_root = nc.Dataset(file_out, "w", format="NETCDF4_CLASSIC")
@@ -1437,6 +3462,373 @@ class DownScaling(object):
         nc_root.close()
 
 
+def _raster_order(values, operators):
+    """Return values formatted in [..., site] in the raster order of the
+    sites, when the sites of operators are grouped by cell (see
+    DownScaling.cellOrder()), or else values as they are."""
+    order = operators.get("order")
+    if order is None:
+        return values
+    raster = np.empty_like(values)
+    raster[..., order] = values
+
+    return raster
+
+
+def _block_segments(bounds, ind_out):
+    """Return the segments (window, beg, end) of windows of time steps in a
+    block of time steps, for the windows overlapping the block.
+
+    Args:
+        bounds: Bounds [window, 2] of the windows in positions of the time
+            steps, the end excluded
+        ind_out: Position of the block in the time steps, see
+            DownScaling.timeBlocks()
+
+    Returns:
+        segments: List of (window, beg, end), with beg and end relative to
+            the block
+    """
+    beg = np.maximum(bounds[:, 0], ind_out.start) - ind_out.start
+    end = np.minimum(bounds[:, 1], ind_out.stop) - ind_out.start
+    windows = np.flatnonzero(end > beg)
+
+    return [(int(w), int(beg[w]), int(end[w])) for w in windows]
+
+
+def _epoch(date):
+    """Return a date (datetime, pandas.Timestamp or numpy.datetime64) in
+    integer seconds since 1970-1-1."""
+    return np.datetime64(date, "s").astype(np.int64)
+
+
+def _downscale_block(state, variable, ind_out, ind_time, reduce):
+    """Downscale one block of time steps, see DownScaling.mapBlocks()."""
+    downscaling, geometry, out, window = state
+    pl_obs, dt = downscaling.interpAll(
+        variable, ind_time, *geometry, surface=reduce is False
+    )
+
+    if reduce is True:
+        pl_obs = pl_obs.sum(axis=-2, dtype=np.float64)
+        dt = dt.sum(axis=-2, dtype=np.float64)
+    elif reduce is not False:
+        # sums over the segments of the windows in the block
+        pl_obs, dt = (
+            np.stack(
+                [
+                    values[..., beg:end, :].sum(axis=-2, dtype=np.float64)
+                    for _, beg, end in reduce
+                ]
+            )
+            for values in (pl_obs, dt)
+        )
+    pl_obs = _raster_order(pl_obs, geometry[2])
+    dt = _raster_order(dt, geometry[2])
+    if reduce is not False or out is None:
+        return pl_obs, dt
+
+    # [2, time, lat, lon], or [2, variable, time, lat, lon]
+    index = (slice(None),) * (pl_obs.ndim - 1) + (ind_out,) + window
+    for values, target in zip((pl_obs, dt), out[index]):
+        target[:] = values.reshape(target.shape)
+
+
+_worker = {}
+
+
+def _share_pickle(value):
+    """Return a SharedMemory block holding value pickled, see
+    DownScaling.mapBlocks()."""
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    memory = SharedMemory(create=True, size=len(data))
+    memory.buf[: len(data)] = data
+
+    return memory
+
+
+def _init_worker(files, options, out, workers):
+    """Open the netcdf files and attach the shared output in a worker
+    process of DownScaling.mapBlocks()."""
+    if options["jit"] and numba is not None:
+        # the workers share the cores instead of each of them using all
+        numba.set_num_threads(max(1, numba.config.NUMBA_NUM_THREADS // workers))
+    if out is not None:
+        memory = SharedMemory(name=out[0])
+        _worker["memory"] = memory  # keep the block mapped
+        out = np.ndarray(out[1], out[2], buffer=memory.buf)
+    _worker["downscaling"] = DownScaling(*files, **options)
+    _worker["out"] = out
+    _worker["tile"] = (None, None)
+
+
+def _run_worker(name, window, task):
+    """Downscale a block of a tile in a worker process, loading the
+    geometry of the tile from the SharedMemory block name on its first
+    block."""
+    if _worker["tile"][0] != name:
+        memory = SharedMemory(name=name)
+        try:
+            geometry = pickle.loads(memory.buf)
+        finally:
+            memory.close()
+        _worker["tile"] = (name, geometry)
+    state = (_worker["downscaling"], _worker["tile"][1], _worker["out"], window)
+
+    return _downscale_block(state, *task)
+
+
+def _reflect_window(values, size):
+    """Return a grid padded for square windows of given width as by
+    scipy.ndimage filters, and the offset of the centre cell of the
+    windows.
+
+    Args:
+        values: Grid formatted in [lat, lon]
+        size: Width of the square window in cells
+
+    Returns:
+        padded: Grid padded with reflected edges as by the 'reflect' mode of
+            scipy.ndimage, also when the window is wider than the grid. The
+            window of cell (i, j) is padded[i : i + size, j : j + size].
+        offset: (dy, dx) position of the cell at the middle of the
+            footprint of generic_filter in the window, (size // 2,
+            size // 2) for an odd size
+    """
+    before = size // 2
+    reflect = []
+    for n in values.shape:
+        index = np.arange(-before, n + size - 1 - before) % (2 * n)
+        reflect.append(np.where(index < n, index, 2 * n - 1 - index))
+
+    return values[np.ix_(*reflect)], _window_centre(size)
+
+
+def _window_centre(size):
+    """Return the position (dy, dx) in a square window of given width of the
+    cell at the middle of the footprint of generic_filter, (size // 2,
+    size // 2) for an odd size."""
+    centre = (size * size - 1) // 2
+
+    return centre // size, centre % size
+
+
+def _rank_count(values, size, band=256):
+    """Return the number of cells of a square window lower than or equal to
+    its centre cell, for every cell of a grid.
+
+    The result is exactly that of scipy.ndimage.generic_filter(values,
+    func, size) with func(x) = np.sum(x <= x[(x.size - 1) // 2]), with the
+    same reflected edges and the same output dtype, but it runs at native
+    speed: the window is swept one offset at a time over bands of rows,
+    each offset comparing whole rows of cells with their centres.
+
+    Args:
+        values: Grid formatted in [lat, lon]
+        size: Width of the square window in cells
+        band: Number of rows compared at once, which bounds the memory of
+            the temporaries
+
+    Returns:
+        count: Counts formatted as values, in the dtype of values
+    """
+    values = np.asarray(values)
+    nrow, ncol = values.shape
+    padded, (dy, dx) = _reflect_window(values, size)
+
+    count = np.zeros(values.shape, np.uint16 if size * size < 2**16 else np.int64)
+    for beg in range(0, nrow, band):
+        end = min(beg + band, nrow)
+        rows = padded[beg : end + size - 1]
+        middle = rows[dy : dy + end - beg, dx : dx + ncol]
+        out = count[beg:end]
+        for i in range(size):
+            for j in range(size):
+                out += rows[i : i + end - beg, j : j + ncol] <= middle
+
+    return count.astype(values.dtype)
+
+
+def _rank_count_binned(values, size, bins=None, split=4, chunk=2**22):
+    """Return the number of cells of a square window lower than or equal to
+    its centre cell, for every cell of a grid, as _rank_count() but at a
+    cost growing with the width of the window instead of its area.
+
+    The distinct values are split into bins of about equal size. The cells
+    of lower bins than the centre cell are counted by a summed-area table
+    of the cells below each bin, and the cells of the bin of the centre
+    cell are compared with it one by one (exact refinement), among the
+    cells of that bin in the blocks of the grid overlapping the window.
+    Bins of a single value, e.g. of a dem in integer metres, need no
+    refinement. Several window widths share the bins and the summed-area
+    tables, which are the bulk of the cost.
+
+    For n cells, the tables cost a pass over the grid per bin and the
+    refinement compares each cell with the about size**2 / bins cells of
+    its bin in its window, that is n * (bins + size**2 / bins) in all. A
+    fixed number of bins would leave a refinement growing with the area of
+    the window, the cost is lowest for about size bins and then grows
+    linearly with the width of the window.
+
+    Args:
+        values: Grid formatted in [lat, lon]
+        size: Width of the square window in cells, or a list of widths
+        bins: Number of bins, at most the number of distinct values. The
+            default is None, 2 * size + 16 for the widest window, which
+            balances the summed-area tables and the refinement.
+        split: Number of blocks across the window in the refinement
+        chunk: Number of cells compared at once in the refinement, which
+            bounds the memory of the temporaries
+
+    Returns:
+        count: Counts formatted as values, preceded by [size] for a list of
+            widths, in the dtype of values
+    """
+    values = np.asarray(values)
+    nrow, ncol = values.shape
+    sizes = [int(width) for width in np.atleast_1d(size)]
+    widest = max(sizes)
+    padded, _ = _reflect_window(values, widest)
+
+    # bins of the distinct values, NaN in none of them as it is never counted
+    distinct = np.unique(values[~np.isnan(values)])
+    bins = min(bins or 2 * widest + 16, distinct.size)
+    first = np.linspace(0, distinct.size, bins, endpoint=False).astype(np.int64)
+    first = np.append(first, distinct.size)  # first distinct value of bins
+    index = np.searchsorted(distinct[first[:-1]], padded, side="right") - 1
+    index = index.astype(np.int32)
+    index[np.isnan(padded)] = bins
+
+    # for each width, the cells of each bin in blocks of the grid for the
+    # refinement, and the centre cells of each bin
+    point_rows, point_cols = np.indices(padded.shape).reshape(2, -1)
+    windows = []
+    for width in sizes:
+        # windows of this width start at shift in the padded grid
+        shift = widest // 2 - width // 2
+        dy, dx = _window_centre(width)
+        side = -(-width // split)
+        blocks = (-(-padded.shape[0] // side), -(-padded.shape[1] // side))
+        block = point_rows // side * blocks[1] + point_cols // side
+        order = np.lexsort((block, index.ravel()))
+        starts = np.searchsorted(index.ravel()[order], np.arange(bins + 1))
+        centre = index[
+            shift + dy : shift + dy + nrow, shift + dx : shift + dx + ncol
+        ].ravel()
+        centres = np.argsort(centre, kind="stable")
+        centre_starts = np.searchsorted(centre[centres], np.arange(bins + 1))
+        windows.append(
+            {
+                "width": width,
+                "shift": shift,
+                "centre": (dy, dx),
+                "side": side,
+                "blocks": blocks,
+                "block": block,
+                "order": order,
+                "starts": starts,
+                "centres": centres,
+                "centre_starts": centre_starts,
+            }
+        )
+
+    count = np.zeros((len(sizes), values.size), np.int64)
+    dtype = np.int32 if padded.size < 2**31 else np.int64
+    table = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype)
+    for b in range(bins):
+        if all(w["centre_starts"][b] == w["centre_starts"][b + 1] for w in windows):
+            continue
+        single = first[b + 1] - first[b] == 1
+        # summed-area table of the cells of lower bins, or of lower or
+        # equal bins for a bin of a single value
+        np.less(index, b + 1 if single else b, out=table[1:, 1:])
+        for row in range(2, table.shape[0]):  # faster than cumsum on axis 0
+            np.add(table[row - 1], table[row], out=table[row])
+        np.cumsum(table, axis=1, out=table)
+
+        for k, window in enumerate(windows):
+            width, (dy, dx) = window["width"], window["centre"]
+            centre_starts = window["centre_starts"]
+            cells = window["centres"][centre_starts[b] : centre_starts[b + 1]]
+            rows, cols = np.divmod(cells, ncol)
+            rows, cols = rows + window["shift"], cols + window["shift"]
+            count[k, cells] = (
+                table[rows + width, cols + width]
+                - table[rows, cols + width]
+                - table[rows + width, cols]
+                + table[rows, cols]
+            )
+            if not single and cells.size:
+                starts = window["starts"]
+                points = window["order"][starts[b] : starts[b + 1]]
+                count[k, cells] += _bin_refine(
+                    (point_rows[points], point_cols[points], padded.ravel()[points]),
+                    window["block"][points],
+                    (rows, cols, padded[rows + dy, cols + dx]),
+                    width,
+                    window["side"],
+                    window["blocks"],
+                    chunk,
+                )
+
+    count = count.reshape((len(sizes),) + values.shape).astype(values.dtype)
+
+    return count if np.ndim(size) else count[0]
+
+
+def _bin_refine(points, block, centres, size, side, blocks, chunk):
+    """Return the number of cells of a bin lower than or equal to the
+    centre cell in the windows of given cells of the bin, see
+    _rank_count_binned().
+
+    Args:
+        points: (rows, cols, values) of the cells of the bin in the padded
+            grid, sorted by block
+        block: Block of the cells, in raster order of the blocks
+        centres: (rows, cols) of the first cell of the windows in the padded
+            grid, and values of their centre cells
+        size: Width of the square window in cells
+        side: Width of the square blocks in cells
+        blocks: Number of blocks along each axis
+        chunk: Number of cells compared at once
+
+    Returns:
+        count: Counts of the centre cells
+    """
+    point_rows, point_cols, point_values = points
+    rows, cols, centre_values = centres
+    starts = np.searchsorted(block, np.arange(blocks[0] * blocks[1] + 1))
+
+    # runs of cells of the blocks overlapping the window, one per row of
+    # blocks, the rows of blocks past the window being empty
+    block_rows = rows[:, None] // side + np.arange(-(-size // side) + 1)
+    valid = block_rows * side < rows[:, None] + size
+    block_rows = np.minimum(block_rows, blocks[0] - 1) * blocks[1]
+    beg = starts[block_rows + (cols // side)[:, None]]
+    end = starts[block_rows + ((cols + size - 1) // side + 1)[:, None]]
+    beg = beg.ravel()
+    length = np.where(valid, end - beg.reshape(end.shape), 0).ravel()
+    query = np.repeat(np.arange(rows.size), block_rows.shape[1])
+
+    count = np.zeros(rows.size, np.int64)
+    total = np.cumsum(length)
+    lo = 0
+    while lo < length.size:
+        done = total[lo - 1] if lo else 0
+        hi = max(lo + 1, np.searchsorted(total, done + chunk, side="right"))
+        n = length[lo:hi]
+        q = np.repeat(query[lo:hi], n)
+        point = np.arange(n.sum()) + np.repeat(beg[lo:hi] - (np.cumsum(n) - n), n)
+        inside = ((point_rows[point] - rows[q]).astype(np.uint64) < size) & (
+            (point_cols[point] - cols[q]).astype(np.uint64) < size
+        )
+        inside &= point_values[point] <= centre_values[q]
+        count += np.bincount(q[inside], minlength=rows.size)
+        lo = hi
+
+    return count
+
+
 class topography(object):
     """
     Return object for topography that has methods for deriving topographic
@@ -1457,6 +3849,10 @@ class topography(object):
     Args:
          demFile: input dem file
          demResoultion: the resolution of input dem in degree
+         window: (rows, cols) slices of the dem to read. Only this window
+            is loaded, the decisions depending on the size of the dem
+            (see sizeCheck() and levels()) are still made on the entire
+            dem. Default is None, the entire dem. See tiles().
 
     Example:
         dem  = 'example_alps.nc'
@@ -1465,14 +3861,16 @@ class topography(object):
         topo.spatialTopo('/Users/bincao/Desktop/topo.nc')
     """
 
-    def __init__(self, demFile, demResolution):
+    def __init__(self, demFile, demResolution, window=None):
         self.R = 6371000  # the mean radius (in meter) of Earth
         self.resolution = demResolution  # units = degree
 
         ds_dem = xr.open_dataset(demFile)
-        self.ele = ds_dem["elevation"][0].values
-        self.lons = ds_dem["lon"].values
-        self.lats = ds_dem["lat"].values
+        rows, cols = window if window is not None else (slice(None), slice(None))
+        self.demShape = list(ds_dem["elevation"].shape[-2:])
+        self.ele = ds_dem["elevation"][0][rows, cols].values
+        self.lons = ds_dem["lon"].values[cols]
+        self.lats = ds_dem["lat"].values[rows]
         self.shape = [len(self.lats), len(self.lons)]
         self.size = len(self.lons) * len(self.lats)
 
@@ -1526,7 +3924,7 @@ class topography(object):
 
         yi = self.pixelLength(self.lats)[0]  # cell size in m
         # dem size [lat, lon] in km
-        size = [yi * dim / 1000 for dim in self.shape]
+        size = [yi * dim / 1000 for dim in self.demShape]
 
         return size
 
@@ -1602,7 +4000,9 @@ class topography(object):
             L: Interger, step number
             coarseValue: Values of coarse scale need be refined
             out_xy: Sites need to be refined
-            limitSize: Maximum cell size input once. This could avoid RAM crash
+            limitSize: Maximum cell size input once. This could avoid RAM
+                crash. The dem is refined by bands of rows of at most
+                limitSize cells.
 
 
         Returns:
@@ -1615,43 +4015,26 @@ class topography(object):
         scale = 3 ** (L - 2)
         latIndex = list(range(int((scale - 1) / 2), len(self.lats), scale))
         lonIndex = list(range(int((scale - 1) / 2), len(self.lons), scale))
-        f = RegularGridInterpolator(
-            (self.lats[latIndex][::-1], self.lons[lonIndex]),
-            coarseValue[::-1, :],
-            method="linear",
-            bounds_error=False,
-            fill_value=None,
-        )
 
         if out_xy is not None:
-            return f(out_xy)
-
-        elif self.size <= limitSize:
-            lon, lat = np.meshgrid(self.lons, self.lats)
-            gridBase = np.array([lat.reshape(lat.size), lon.reshape(lon.size)]).T
-            fineValue = f(gridBase)
-            return fineValue.reshape((len(self.lats), len(self.lons)))
-        else:
-            fineValue = np.zeros((len(self.lats), len(self.lons)))
-            chunkN = self.size / limitSize
-            latLegth = len(self.lats) / chunkN
-
-            for pieceN in range(0, chunkN - 1):
-                startLat = latLegth * pieceN
-                endLat = latLegth * (pieceN + 1)
-                lon, lat = np.meshgrid(self.lons, self.lats[startLat:endLat])
-                gridBase = np.array([lat.reshape(lat.size), lon.reshape(lon.size)]).T
-                fineValue[startLat:endLat, :] = f(gridBase).reshape(
-                    latLegth, len(self.lons)
-                )
-
-            lon, lat = np.meshgrid(self.lons, self.lats[latLegth * (chunkN - 1) :])
-            gridBase = np.array([lat.reshape(lat.size), lon.reshape(lon.size)]).T
-            fineValue[latLegth * (chunkN - 1) :, :] = f(gridBase).reshape(
-                len(self.lats[latLegth * (chunkN - 1) :]), len(self.lons)
+            f = RegularGridInterpolator(
+                (self.lats[latIndex][::-1], self.lons[lonIndex]),
+                coarseValue[::-1, :],
+                method="linear",
+                bounds_error=False,
+                fill_value=None,
             )
+            return f(out_xy)
 
-            return fineValue
+        # separable upsampling, see _grid_interp()
+        return _grid_interp(
+            self.lats[latIndex],
+            self.lons[lonIndex],
+            coarseValue,
+            self.lats,
+            self.lons,
+            size=limitSize,
+        )
 
     def flatness(self, ele, Tf, out_xy=None, L=1, Pf=4):
         """
@@ -1712,11 +4095,6 @@ class topography(object):
             flatness = self.refine(L=L, coarseValue=flatness, out_xy=out_xy)
             return flatness
 
-    def __percentile(self, x):
-        """Return the rank of the element in surrouding cells.
-        The function is called by lowness function"""
-        return np.sum(x <= x[int((x.size - 1) / 2)])
-
     def lowness(self, ele, out_xy=None, L=1, Tl=0.4, Pl=3, lowRadius=13):
         """
         Returns lowness for given sites, which is measured as the radio of
@@ -1746,7 +4124,7 @@ class topography(object):
         """
 
         size = float(lowRadius) ** 2
-        pctl = generic_filter(ele, self.__percentile, size=lowRadius)
+        pctl = _rank_count(ele, lowRadius)
         pctl /= size
         lowness = self.scale(pctl, Tl, Pl)
         if L <= 2:
@@ -1817,11 +4195,7 @@ class topography(object):
         # smoothed base resolution dem
         sdemL = self.smoothDEM(self.ele)
         meanKernel = np.full((3, 3), 1.0 / (3 * 3))
-        for L in range(3, 9):
-            # break when step size is out boundery of image
-            scale = 3 ** (L - 2)
-            if scale > int(self.lats.size / 4) or scale > int(self.lats.size / 4):
-                break
+        for L in range(3, self.levels() + 1):
             # print L
             shape = sdemL.shape
             Tf = initTf / (2 ** (L - 1))
@@ -1842,6 +4216,105 @@ class topography(object):
 
         return mrvbf
 
+    def levels(self):
+        """
+        Returns the last step of nmrvbf(), at most 8. The steps stop when the
+        step size is out of the boundary of the dem.
+        """
+
+        for L in range(3, 9):
+            if 3 ** (L - 2) > int(self.demShape[0] / 4):
+                return L - 1
+
+        return 8
+
+    def mrvbfHalo(self):
+        """
+        Returns the halo and the alignment in cells of the tiles of
+        nmrvbf(), see tiles().
+
+        A cell of step L depends on the smoothed dem (radius of 23 cells),
+        on the aggregations of the steps 3 to L, on the lowness (radius of 6
+        cells of step L) and on the refinement (1 cell of step L). The
+        tiles are aligned on the cells of the last step so that the
+        aggregations of each tile match those of the entire dem.
+        """
+
+        scale = 3 ** max(self.levels() - 2, 0)
+        halo = 23 + (scale - 1) // 2 + (6 + 1) * scale + 1
+
+        return halo, scale
+
+    def hypsoHalo(self, bound=30):
+        """
+        Returns the halo and the alignment in cells of the tiles of
+        coarseHypso(), see tiles(). The tiles are aligned on the cells of
+        the aggregated dem.
+        """
+
+        yi = self.pixelLength(self.lats)[0]
+        scaleFactor = int(np.ceil(500 // yi) // 2 * 2 + 1)
+        lowRadius = int(bound * 1000 / 500) + 1
+        halo = scaleFactor // 2 + (lowRadius // 2 + 1) * scaleFactor + 1
+
+        return halo, scaleFactor
+
+    def rangeHalo(self, bound=30):
+        """
+        Returns the halo and the alignment in cells of the tiles of
+        eleRange(), see tiles().
+        """
+
+        lowRadius = int(bound * 1000 / (self.pixelLength(self.lats)[0]))
+        # truncated gaussian of eleRanges() and min/max filter
+        halo = int(4.0 * np.sqrt(4.5) + 0.5) + lowRadius // 2 + 1
+
+        return halo, 1
+
+    def tiles(self, tile, halo=0, align=1):
+        """
+        Yields the windows of the dem to analyse one after another. A tile
+        is read with a halo of cells around it, so that the cells of the
+        tile are equal to those of the entire dem.
+
+        Args:
+            tile: Number of cells [lat, lon] of a tile, or a single number
+            halo: Number of cells around a tile, see mrvbfHalo(),
+                hypsoHalo() and rangeHalo().
+            align: The tiles and halos are rounded up to multiples of align
+                cells.
+
+        Yields:
+            window: (rows, cols) slices of the dem to read, see topography
+            inner: (rows, cols) slices of the tile within the window
+            dst: (rows, cols) slices of the tile within the dem
+
+        Example:
+            halo, align = topo.mrvbfHalo()
+            for window, inner, dst in topo.tiles(1024, halo, align):
+                mrvbf[dst] = topography(dem, res, window).nmrvbf()[inner]
+        """
+
+        tile = np.broadcast_to(tile, 2)
+        tile = [-(-int(t) // align) * align for t in tile]
+        halo = -(-int(halo) // align) * align
+        nrow, ncol = self.demShape
+        for r0 in range(0, nrow, tile[0]):
+            for c0 in range(0, ncol, tile[1]):
+                dst = (
+                    slice(r0, min(r0 + tile[0], nrow)),
+                    slice(c0, min(c0 + tile[1], ncol)),
+                )
+                window = tuple(
+                    slice(max(d.start - halo, 0), min(d.stop + halo, n))
+                    for d, n in zip(dst, (nrow, ncol))
+                )
+                inner = tuple(
+                    slice(d.start - w.start, d.stop - w.start)
+                    for d, w in zip(dst, window)
+                )
+                yield window, inner, dst
+
     def aggregation(self, dem, scaleFactor=3):
         """ "
         Return a aggregated DEM, in which the cell size is is increased by
@@ -1911,17 +4384,21 @@ class topography(object):
 
         Args:
             out_xy: Site to simulate hypsometric position.
-            bound: Diameter of surrounding area in km.
+            bound: Diameter of surrounding area in km, or a list of
+                diameters.
 
         Returns:
             lowness: Hyposmetric position in the surrouding area. Lowness
-            ranges from 1 (deepest valley) to 0 (highest peak).
+            ranges from 1 (deepest valley) to 0 (highest peak). It is
+            formatted in [bound, site] for a list of diameters.
 
         Example:
             out_xy = np.array([[46.749374, 9.5506067, 1556.0],
                                [46.665974, 9.6340027, 939.0]])
             lowness = topo.siteHypso(out_xy)
         """
+        if np.ndim(bound):
+            return np.array([self.siteHypso(out_xy, b) for b in bound])
 
         lowness = []
         for i, site in enumerate(out_xy):
@@ -1936,44 +4413,50 @@ class topography(object):
         Return hypsometric position based on fine scale of dem.
 
         Args:
-            bound: Diameter of surrounding size
+            bound: Diameter of surrounding size, or a list of diameters
+                sharing a single pass over the dem
 
         Returns:
             lowness: Hypsometric position of all dem cells derived from
-            fine scale of dem.
+            fine scale of dem, preceded by [bound] for a list of diameters.
 
         Examples:
             hypso = topo.hypso(bound = 30, out_xy = None)
+            hypso = topo.hypso(bound = [10, 20, 30])
         """
 
         yi = self.pixelLength(self.lats)[0]
-        lowRadius = int((bound * 1000 / yi))
-        pctl = generic_filter(self.ele, self.__percentile, size=lowRadius)
-        pctl = pctl / (float(lowRadius) ** 2)
-        lowness = 1 - pctl
-        del pctl
+        lowRadius = [int((b * 1000 / yi)) for b in np.atleast_1d(bound)]
+        count = _rank_count_binned(self.ele, lowRadius)
+        lowness = []
+        for pctl, radius in zip(count, lowRadius):
+            pctl = pctl / (float(radius) ** 2)
+            lowness.append(1 - pctl)
+        del count, pctl
 
         if not (out_xy is None):
-            lowInterp = RegularGridInterpolator(
-                (self.lats[::-1], self.lons),
-                lowness[::-1],
-                method="linear",
-                bounds_error=False,
-                fill_value=None,
-            )
-            lowness = lowInterp(out_xy)
-        return lowness
+            for i, values in enumerate(lowness):
+                lowInterp = RegularGridInterpolator(
+                    (self.lats[::-1], self.lons),
+                    values[::-1],
+                    method="linear",
+                    bounds_error=False,
+                    fill_value=None,
+                )
+                lowness[i] = lowInterp(out_xy)
+        return np.stack(lowness) if np.ndim(bound) else lowness[0]
 
     def coarseHypso(self, bound=30, out_xy=None):
         """
         Return hypsometric position based on coarse scale of dem.
 
         Args:
-            bound: Diameter of surrounding size
+            bound: Diameter of surrounding size, or a list of diameters
+                sharing a single pass over the dem
 
         Returns:
             lowness: Hypsometric position of all dem cells derived from
-            fine scale of dem.
+            fine scale of dem, preceded by [bound] for a list of diameters.
 
         Examples:
             hypso = topo.hypso(bound = 30, out_xy = None)
@@ -1983,31 +4466,36 @@ class topography(object):
         scaleFactor = int(np.ceil(500 // yi) // 2 * 2 + 1)
         aggDem = self.aggregation(self.ele, scaleFactor)
 
-        # lowness
-        lowRadius = 61  # bound*1000/500
-        pctl = generic_filter(aggDem[0], self.__percentile, size=lowRadius) / (
-            float(lowRadius) ** 2
-        )
-        lowness = 1 - pctl
-
-        # refine
-        lowInterp = RegularGridInterpolator(
-            (self.lats[aggDem[1]][::-1], self.lons[aggDem[2]]),
-            lowness[::-1],
-            method="linear",
-            bounds_error=False,
-            fill_value=None,
-        )
+        # lowness, 61 cells for 30 km
+        lowRadius = [int(b * 1000 / 500) + 1 for b in np.atleast_1d(bound)]
+        count = _rank_count_binned(aggDem[0], lowRadius)
+        lowness = []
+        for pctl, radius in zip(count, lowRadius):
+            pctl = pctl / (float(radius) ** 2)
+            values = 1 - pctl
 
-        if not (out_xy is None):
-            lowness = lowInterp(out_xy)
+            # refine
+            if not (out_xy is None):
+                lowInterp = RegularGridInterpolator(
+                    (self.lats[aggDem[1]][::-1], self.lons[aggDem[2]]),
+                    values[::-1],
+                    method="linear",
+                    bounds_error=False,
+                    fill_value=None,
+                )
+                values = lowInterp(out_xy)
 
-        else:
-            lon, lat = np.meshgrid(self.lons, self.lats)
-            gridBase = np.array([lat.reshape(lat.size), lon.reshape(lon.size)]).T
-            lowness = lowInterp(gridBase).reshape((len(self.lats), len(self.lons)))
+            else:
+                values = _grid_interp(
+                    self.lats[aggDem[1]],
+                    self.lons[aggDem[2]],
+                    values,
+                    self.lats,
+                    self.lons,
+                )
+            lowness.append(values)
 
-        return lowness  # ,pctl
+        return np.stack(lowness) if np.ndim(bound) else lowness[0]
 
     def eleRange(self, bound=30, out_xy=None):
         """
@@ -2018,35 +4506,62 @@ class topography(object):
         neighbourhood 30 km area.
 
         Args:
-            bound: Diameter of surrounding size in km
+            bound: Diameter of surrounding size in km, or a list of
+                diameters sharing the smoothing of the dem
 
         Returns:
-            rangeE: Array like, range of elevation range.
+            rangeE: Array like, range of elevation range, preceded by
+            [bound] for a list of diameters.
 
 
         Example:
             eleRange = topo.eleRange(out_xy = None, bound = 30)
         """
 
+        if np.ndim(bound):
+            return np.stack(list(self.eleRanges(bound, out_xy)))
+
         if self.sizeCheck():
             centerlat = self.lats[len(self.lats) / 2]
             centerlon = self.lons[len(self.lons) / 2]
             subEle = self.aroundArea([centerlat, centerlon])
 
-            rangeCon = np.max(subEle) - np.min(subEle)
+            rangeCon = np.max(subEle) - np.min(subEle)
+
+            if not (out_xy is None):
+                rangeE = np.repeat(rangeCon, len(out_xy))
+            else:
+                rangeE = np.ones(self.shape) * rangeCon
+
+        else:
+            rangeE = next(self.eleRanges([bound], out_xy))
+
+        return rangeE
+
+    def eleRanges(self, bounds, out_xy=None):
+        """
+        Yields elevation range of several neighbourhood diameters one after
+        another, smoothing the dem once, see eleRange().
+
+        Args:
+            bounds: Diameters of surrounding size in km
 
-            if not (out_xy is None):
-                rangeE = np.repeat(rangeCon, len(out_xy))
-            else:
-                rangeE = np.ones(self.shape) * rangeCon
+        Yields:
+            rangeE: Array like, range of elevation range of each diameter.
+        """
 
-        else:
+        if self.sizeCheck():
+            for bound in bounds:
+                yield self.eleRange(bound, out_xy)
+            return
+
+        dem = gaussian_filter(self.ele, np.sqrt(4.5))
+        for bound in bounds:
             lowRadius = bound * 1000 / (self.pixelLength(self.lats)[0])
-            dem = gaussian_filter(self.ele, np.sqrt(4.5))
             minEle = minimum_filter(dem, size=lowRadius)
             maxEle = maximum_filter(dem, size=lowRadius)
             rangeE = maxEle - minEle
-            del minEle, maxEle, dem
+            del minEle, maxEle
             if not (out_xy is None):
                 rangeInterp = RegularGridInterpolator(
                     (self.lats[::-1], self.lons),
@@ -2056,8 +4571,71 @@ class topography(object):
                     fill_value=None,
                 )
                 rangeE = rangeInterp(out_xy)
+            yield rangeE
 
-        return rangeE
+    def spatialRadii(self, file_out, bounds=(10, 20, 30), fine=False):
+        """
+        Exports hypsometric position and elevation range of several
+        neighbourhood diameters in netcdf format, with a bound dimension.
+        The fields are computed diameter after diameter and each is written
+        as soon as it is computed, so that a single field of the dem is kept
+        in memory at once.
+
+        Args:
+            file_out: Output file in netcdf format
+            bounds: Diameters of surrounding size in km
+            fine: Hypsometric position based on fine scale of dem (see
+                hypso()) instead of coarse scale (see coarseHypso()).
+                Default is False, as used by landSurCorrectionFac.
+
+        Example:
+            topo.spatialRadii('topo_radii.nc', bounds=[10, 20, 30])
+        """
+
+        # create nc file
+        nc_root = nc.Dataset(file_out, "w", format="NETCDF4_CLASSIC")
+
+        # create dimensions
+        nc_root.createDimension("bound", len(bounds))
+        nc_root.createDimension("lat", self.shape[0])
+        nc_root.createDimension("lon", self.shape[1])
+
+        # create variables
+        radius = nc_root.createVariable("bound", "f4", ("bound"))
+        longitudes = nc_root.createVariable("lon", "f4", ("lon"))
+        latitudes = nc_root.createVariable("lat", "f4", ("lat"))
+        dimensions = ("bound", "lat", "lon")
+        chunksizes = (1,) + tuple(self.shape)
+        Hypso = nc_root.createVariable(
+            "hypso", "f4", dimensions, zlib=True, chunksizes=chunksizes
+        )
+        RangeE = nc_root.createVariable(
+            "eleRange", "f4", dimensions, zlib=True, chunksizes=chunksizes
+        )
+
+        radius.setncatts({"long_name": "diameter of the neighbourhood"})
+        longitudes.setncatts({"long_name": "longitude"})
+        latitudes.setncatts({"long_name": "latitude"})
+        Hypso.setncatts({"long_name": "hyposmetric position"})
+        RangeE.setncatts({"long_name": "elevation range in prescirbed neighbourhood"})
+
+        # attribute
+        nc_root.description = "fine-scale DEM-derived topographic factors"
+        radius.units = "km"
+        longitudes.units = "degree_east (demical)"
+        latitudes.units = "degree_north (demical)"
+
+        # assign variables
+        try:
+            radius[:] = bounds
+            longitudes[:] = self.lons
+            latitudes[:] = self.lats
+            for i, bound in enumerate(bounds):
+                Hypso[i] = self.hypso(bound) if fine else self.coarseHypso(bound)
+            for i, values in enumerate(self.eleRanges(bounds)):
+                RangeE[i] = values
+        finally:
+            nc_root.close()
 
 
 class landSurCorrectionFac(object):
@@ -2071,6 +4649,9 @@ class landSurCorrectionFac(object):
         beta:  A factor relating to fractional influence of surface effects on
                air temperature.
         gamma: A factor relating to cold air pooling on air temperature.
+        tile: Number of cells [lat, lon] of the tiles of the dem analysed one
+              after another by spatialLSCF(), or a single number. Default is
+              None, the entire dem is analysed at once.
 
         The default values are derived from the Swiss Alps. Please see details
         from the REDCAPP paper.
@@ -2085,12 +4666,13 @@ class landSurCorrectionFac(object):
         LSCF = lscf.correctionFactor(hypso, mrvbf, eleRange)
     """
 
-    def __init__(self, dem, demResolution, alpha=0.61, beta=1.56, gamma=465):
+    def __init__(self, dem, demResolution, alpha=0.61, beta=1.56, gamma=465, tile=None):
         self.dem = dem
         self.gamma = gamma
         self.beta = beta
         self.alpha = alpha
         self.resolution = demResolution
+        self.tile = tile
 
         ds_dem = xr.open_dataset(dem)
         self.lats = ds_dem["lat"].values
@@ -2110,30 +4692,105 @@ class landSurCorrectionFac(object):
 
         return lscf
 
-    def spatialLSCF(self, file_out: str | Path):
-        """Returns and export spatialized land surface correction"""
+    def tileFactors(self, directory: str | Path):
+        """
+        Returns mrvbf, hypso, eleRange and lscf of the dem analysed tile by
+        tile, as arrays memory-mapped in .npy files of the directory. Only a
+        tile of the dem and its halo are read at once (see
+        topography.tiles()), so that the factors are equal to those of the
+        entire dem.
 
-        topo = topography(self.dem, self.resolution)
-        mrvbf = topo.nmrvbf(out_xy=None, initTf=50.0)
-        hypso = topo.coarseHypso()
-        eleR = topo.eleRange()
-        lscf = self.LSCF(hypso, mrvbf, eleR)
+        Args:
+            directory: Directory of the memory-mapped factors
+
+        Returns:
+            factors: Dictionary of the memory-mapped factors by name
+        """
+
+        # only the size of the dem is read
+        probe = topography(self.dem, self.resolution, (slice(0, 0), slice(0, 0)))
+        factors = {}
+        jobs = [
+            ("mrvbf", probe.mrvbfHalo(), lambda t: t.nmrvbf(out_xy=None, initTf=50.0)),
+            ("hypso", probe.hypsoHalo(), lambda t: t.coarseHypso()),
+            ("eleRange", probe.rangeHalo(), lambda t: t.eleRange()),
+        ]
+        for name, (halo, align), factor in jobs:
+            for window, inner, dst in probe.tiles(self.tile, halo, align):
+                values = factor(topography(self.dem, self.resolution, window))
+                if name not in factors:
+                    factors[name] = np.lib.format.open_memmap(
+                        Path(directory) / (name + ".npy"),
+                        mode="w+",
+                        dtype=values.dtype,
+                        shape=tuple(probe.demShape),
+                    )
+                factors[name][dst] = values[inner]
+                del values
+
+        for _, _, dst in probe.tiles(self.tile):
+            lscf = self.LSCF(
+                factors["hypso"][dst], factors["mrvbf"][dst], factors["eleRange"][dst]
+            )
+            if "lscf" not in factors:
+                factors["lscf"] = np.lib.format.open_memmap(
+                    Path(directory) / "lscf.npy",
+                    mode="w+",
+                    dtype=lscf.dtype,
+                    shape=tuple(probe.demShape),
+                )
+            factors["lscf"][dst] = lscf
+
+        return factors
+
+    def spatialLSCF(self, file_out: str | Path):
+        """Returns and export spatialized land surface correction. With the
+        tile option, the factors are analysed and written tile by tile (see
+        tileFactors()) and equal those of the entire dem."""
+
+        if self.tile is None:
+            topo = topography(self.dem, self.resolution)
+            mrvbf = topo.nmrvbf(out_xy=None, initTf=50.0)
+            hypso = topo.coarseHypso()
+            eleR = topo.eleRange()
+            lscf = self.LSCF(hypso, mrvbf, eleR)
+            shape = mrvbf.shape
+            windows = [(slice(None), slice(None))]
+            chunksizes = None
+        else:
+            workdir = tempfile.TemporaryDirectory(dir=Path(file_out).parent)
+            factors = self.tileFactors(workdir.name)
+            mrvbf, hypso = factors["mrvbf"], factors["hypso"]
+            eleR, lscf = factors["eleRange"], factors["lscf"]
+            shape = mrvbf.shape
+            probe = topography(self.dem, self.resolution, (slice(0, 0), slice(0, 0)))
+            windows = [dst for _, _, dst in probe.tiles(self.tile)]
+            chunksizes = [w.stop - w.start for w in windows[0]]
 
         # ---- export geomorphometric factors ---------------------------------
         # create nc file
         nc_root = nc.Dataset(file_out, "w", format="NETCDF4_CLASSIC")
 
         # create dimensions
-        nc_root.createDimension("lat", mrvbf.shape[0])
-        nc_root.createDimension("lon", mrvbf.shape[1])
+        nc_root.createDimension("lat", shape[0])
+        nc_root.createDimension("lon", shape[1])
 
         # create variables
         longitudes = nc_root.createVariable("lon", "f4", ("lon"))
         latitudes = nc_root.createVariable("lat", "f4", ("lat"))
-        Hypso = nc_root.createVariable("hypso", "f4", ("lat", "lon"), zlib=True)
-        Mrvbf = nc_root.createVariable("mrvbf", "f4", ("lat", "lon"), zlib=True)
-        RangeE = nc_root.createVariable("eleRange", "f4", ("lat", "lon"), zlib=True)
-        Lscf = nc_root.createVariable("lscf", "f4", ("lat", "lon"), zlib=True)
+        dimensions = ("lat", "lon")
+        Hypso = nc_root.createVariable(
+            "hypso", "f4", dimensions, zlib=True, chunksizes=chunksizes
+        )
+        Mrvbf = nc_root.createVariable(
+            "mrvbf", "f4", dimensions, zlib=True, chunksizes=chunksizes
+        )
+        RangeE = nc_root.createVariable(
+            "eleRange", "f4", dimensions, zlib=True, chunksizes=chunksizes
+        )
+        Lscf = nc_root.createVariable(
+            "lscf", "f4", dimensions, zlib=True, chunksizes=chunksizes
+        )
 
         longitudes.setncatts({"long_name": "longitude"})
         latitudes.setncatts({"long_name": "latitude"})
@@ -2144,13 +4801,14 @@ class landSurCorrectionFac(object):
         RangeE.setncatts({"long_name": "elevation range in prescirbed neighbourhood"})
         Lscf.setncatts({"long_name": "Land surface correction factor"})
 
-        # assign variables
+        # assign variables, window by window of the tiles
         longitudes[:] = self.lons
         latitudes[:] = self.lats
-        Hypso[:] = hypso
-        Mrvbf[:] = mrvbf
-        RangeE[:] = eleR
-        Lscf[:] = lscf
+        for dst in windows:
+            Hypso[dst] = hypso[dst]
+            Mrvbf[dst] = mrvbf[dst]
+            RangeE[dst] = eleR[dst]
+            Lscf[dst] = lscf[dst]
 
         # attribute
         nc_root.description = "fine-scale DEM-derived topographic factors"
@@ -2159,6 +4817,11 @@ class landSurCorrectionFac(object):
 
         nc_root.close()
 
+        if self.tile is not None:
+            lscf = np.array(lscf)
+            del factors, mrvbf, hypso, eleR
+            workdir.cleanup()
+
         return lscf
 
     def stationLSCF(self, stations, file_out):
@@ -2185,6 +4848,279 @@ class landSurCorrectionFac(object):
         return lscf
 
 
+def _window_overlap(tile, window, shape):
+    """Return the part of a tile inside a window of an array of given shape,
+    as slices of the window and slices of the tile."""
+    dst, src = [], []
+    for t, w, n in zip(tile, window, shape):
+        t0, t1, _ = t.indices(n)
+        w0, w1, _ = w.indices(n)
+        beg = max(t0, w0)
+        end = max(min(t1, w1), beg)
+        dst.append(slice(beg - w0, end - w0))
+        src.append(slice(beg - t0, end - t0))
+
+    return tuple(dst), tuple(src)
+
+
+class Reducer(abc.ABC):
+    """
+    Parent class of single-pass statistics over time of the REDCAPP
+    temperature. They are updated block of time steps by block of time steps
+    and tile by tile (see DownScaling.spatialBlocks()) with a state of a few
+    values per pixel, so that the time series is never kept in memory.
+
+    Args:
+        shape: Shape [lat, lon] of the fields
+
+    Example:
+        reducer = StdReducer(shape)
+        for (ind_out, rows, cols), time, temp in blocks:
+            reducer.update(temp, time, (rows, cols))
+        std = reducer.result()
+    """
+
+    name = None
+    long_name = None
+    units = "celsius"
+
+    def __init__(self, shape):
+        self.shape = tuple(shape)
+
+    @abc.abstractmethod
+    def update(self, values, time, window):
+        """Adds the values [time, lat, lon] of the dates time, on the
+        (rows, cols) window of the fields."""
+
+    @abc.abstractmethod
+    def result(self):
+        """Returns the statistic formatted in [lat, lon]."""
+
+
+class MeanReducer(Reducer):
+    """Mean over time, see Reducer."""
+
+    name = "mean"
+    long_name = "mean air temperature"
+
+    def __init__(self, shape):
+        super().__init__(shape)
+        self.count = np.zeros(self.shape)
+        self.total = np.zeros(self.shape)
+
+    def update(self, values, time, window):
+        self.count[window] += values.shape[0]
+        self.total[window] += values.sum(axis=0, dtype=np.float64)
+
+    def result(self):
+        return self.total / self.count
+
+
+class StdReducer(Reducer):
+    """Standard deviation over time, see Reducer.
+
+    The count, mean and sum of squared deviations of each block are merged
+    into the running ones with the update of Welford (Chan et al., 1979),
+    which does not lose precision as the sum of squares does."""
+
+    name = "std"
+    long_name = "standard deviation of air temperature"
+
+    def __init__(self, shape):
+        super().__init__(shape)
+        self.count = np.zeros(self.shape)
+        self.mean = np.zeros(self.shape)
+        self.m2 = np.zeros(self.shape)
+
+    def update(self, values, time, window):
+        n = values.shape[0]
+        mean = values.mean(axis=0, dtype=np.float64)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        count = self.count[window]
+        total = count + n
+        delta = mean - self.mean[window]
+        self.mean[window] += delta * (n / total)
+        self.m2[window] += m2 + delta**2 * (count * n / total)
+        self.count[window] = total
+
+    def result(self):
+        return np.sqrt(self.m2 / self.count)
+
+
+class MinReducer(Reducer):
+    """Minimum over time, see Reducer."""
+
+    name = "min"
+    long_name = "minimum air temperature"
+
+    def __init__(self, shape):
+        super().__init__(shape)
+        self.value = np.full(self.shape, np.inf)
+
+    def update(self, values, time, window):
+        self.value[window] = np.minimum(self.value[window], values.min(axis=0))
+
+    def result(self):
+        return np.where(np.isinf(self.value), np.nan, self.value)
+
+
+class MaxReducer(Reducer):
+    """Maximum over time, see Reducer."""
+
+    name = "max"
+    long_name = "maximum air temperature"
+
+    def __init__(self, shape):
+        super().__init__(shape)
+        self.value = np.full(self.shape, -np.inf)
+
+    def update(self, values, time, window):
+        self.value[window] = np.maximum(self.value[window], values.max(axis=0))
+
+    def result(self):
+        return np.where(np.isinf(self.value), np.nan, self.value)
+
+
+class PeriodReducer(Reducer):
+    """Parent class of statistics of the means over periods of time, e.g.
+    daily or annual means, see Reducer. The mean of a period is passed to
+    close() once the time steps of the window move past it, so that the
+    time steps of each window must come in increasing order, as they do
+    from DownScaling.spatialBlocks()."""
+
+    def __init__(self, shape):
+        super().__init__(shape)
+        self.count = np.zeros(self.shape)
+        self.total = np.zeros(self.shape)
+        self.value = np.zeros(self.shape)
+        self.window = None
+        self.key = None
+
+    @abc.abstractmethod
+    def period(self, time):
+        """Returns the key [time] of the period of each date."""
+
+    @abc.abstractmethod
+    def close(self, mean, window):
+        """Adds the mean [lat, lon] of a period on the window."""
+
+    def flush(self):
+        """Closes the period in progress."""
+        if self.key is not None:
+            window = self.window
+            self.close(self.total[window] / self.count[window], window)
+            self.total[window] = 0
+            self.count[window] = 0
+        self.key = None
+
+    def update(self, values, time, window):
+        if window != self.window:
+            self.flush()
+            self.window = window
+        keys = self.period(time)
+        start = 0
+        for stop in list(np.flatnonzero(keys[1:] != keys[:-1]) + 1) + [len(keys)]:
+            if keys[start] != self.key:
+                self.flush()
+                self.key = keys[start]
+            self.total[window] += values[start:stop].sum(axis=0, dtype=np.float64)
+            self.count[window] += stop - start
+            start = stop
+
+    def result(self):
+        self.flush()
+        return self.value
+
+
+def _days(time):
+    """Returns the day of each date as an integer yyyymmdd."""
+    return np.array([t.year * 10000 + t.month * 100 + t.day for t in time])
+
+
+class FreezingDegreeDays(PeriodReducer):
+    """Freezing degree days, the sum of the negated daily mean temperatures
+    below 0 degree celsius, see PeriodReducer."""
+
+    name = "fdd"
+    long_name = "freezing degree days"
+    units = "degree_celsius day"
+
+    def period(self, time):
+        return _days(time)
+
+    def close(self, mean, window):
+        self.value[window] += np.maximum(-mean, 0)
+
+
+class ThawingDegreeDays(PeriodReducer):
+    """Thawing degree days, the sum of the daily mean temperatures above 0
+    degree celsius, see PeriodReducer."""
+
+    name = "tdd"
+    long_name = "thawing degree days"
+    units = "degree_celsius day"
+
+    def period(self, time):
+        return _days(time)
+
+    def close(self, mean, window):
+        self.value[window] += np.maximum(mean, 0)
+
+
+class FrostDays(PeriodReducer):
+    """Number of days with a daily mean temperature below 0 degree celsius,
+    see PeriodReducer."""
+
+    name = "frost_days"
+    long_name = "number of days below 0 degree celsius"
+    units = "days"
+
+    def period(self, time):
+        return _days(time)
+
+    def close(self, mean, window):
+        self.value[window] += mean < 0
+
+
+class AnnualMean(PeriodReducer):
+    """Mean annual air temperature (MAAT), the mean of the annual means of
+    the calendar years of the date range, see PeriodReducer. Years only
+    partly covered by the date range are averaged over their time steps in
+    it, so that the date range should cover whole years."""
+
+    name = "maat"
+    long_name = "mean annual air temperature"
+
+    def __init__(self, shape):
+        super().__init__(shape)
+        self.years = np.zeros(self.shape)
+
+    def period(self, time):
+        return np.array([t.year for t in time])
+
+    def close(self, mean, window):
+        self.value[window] += mean
+        self.years[window] += 1
+
+    def result(self):
+        return super().result() / self.years
+
+
+REDUCERS = {
+    reducer.name: reducer
+    for reducer in (
+        MeanReducer,
+        StdReducer,
+        MinReducer,
+        MaxReducer,
+        FreezingDegreeDays,
+        ThawingDegreeDays,
+        FrostDays,
+        AnnualMean,
+    )
+}
+
+
 class redcappTemp(object):
     """returns REDCAPP derived surface air temperature for both
     given dem area (spatialized mean air temperature) and
@@ -2239,6 +5175,9 @@ class redcappTemp(object):
         beta=1.56,
         gamma=465,
         overwrite=False,
+        variables=None,
+        terrain_tile=None,
+        **options,
     ):
         """Initializes the class.
 
@@ -2264,17 +5203,33 @@ class redcappTemp(object):
             is 465.
         overwrite : bool, optional
             Overwrite the existing file. The default is False.
+        variables : list of str, optional
+            Other pressure level variables downscaled in the same pass as
+            the temperature, e.g. ["Relative humidity"], and written along
+            with it to the spatial and station outputs. They are upper-air
+            values at the dem or station elevation, without land surface
+            correction. The default is None.
+        terrain_tile : int or list of int, optional
+            Number of cells [lat, lon] of the tiles of the dem in the terrain
+            analysis, see the tile option of landSurCorrectionFac. The
+            default is None, the entire dem is analysed at once.
+        **options
+            Options of the downscaling (engine, block, tile), see
+            DownScaling.
         """
         self.geop = geop
         self.sa = sa
         self.pl = pl
         self.variable = "Temperature"
+        self.variables = [self.variable] + list(variables or [])
         self.daterange = daterange
         self.dem = dem
         self.alpha = alpha
         self.beta = beta
         self.gamma = gamma
         self.overwrite = overwrite
+        self.terrain_tile = terrain_tile
+        self.options = options
 
         ds_dem = xr.open_dataset(dem)
         tf = ds_dem["spatial_ref"].attrs["GeoTransform"]
@@ -2283,41 +5238,81 @@ class redcappTemp(object):
         self.lats = ds_dem["lat"].values
         self.lons = ds_dem["lon"].values
 
+    def edgeWindow(self, value_mean):
+        """Returns the rows and columns kept by edgeClip() for a 2D field.
+
+        Parameters
+        ----------
+        value_mean : np.array
+            Field formatted in [lat, lon], without data at the edge.
+
+        Returns
+        -------
+        rows, cols: slice
+            Window of the field with data.
+        """
+        center = [int(i / 2) for i in value_mean.shape]
+        rows = cols = slice(None)
+
+        if np.isnan(value_mean).sum() > 0:
+            left = np.min(np.where(np.isnan(value_mean[center[0], :])))  # left
+            right = np.max(np.where(np.isnan(value_mean[center[0], :]))) + 1  # right
+
+            upper = np.min(np.where(np.isnan(value_mean[:, center[1]])))  # upper
+            low = np.max(np.where(np.isnan(value_mean[:, center[1]]))) + 1  # low
+
+            rows = slice(upper, low)
+            cols = slice(left, right)
+
+        return rows, cols
+
     def edgeClip(self, values):
         """
         Drops the egde of temperature without data caused by mrvbf simulation.
         """
-
-        lons = self.lons
-        lats = self.lats
         # the corner with values
         shape = values.shape
         if len(shape) == 2:
-            center = [int(i / 2) for i in shape]
             value_mean = values
-        elif len(shape) == 3:
-            center = [int(i / 2) for i in shape[1:]]
-            value_mean = np.nanmean(values, axis=0)
+        elif len(shape) > 2:
+            value_mean = np.nanmean(values.reshape((-1,) + shape[-2:]), axis=0)
         else:
-            raise ValueError("Only 2D or 3D arrays are supported.")
+            raise ValueError("Only arrays of 2 or more dimensions are supported.")
 
-        if np.isnan(value_mean).sum() > 0:
-            left = np.min(np.where(np.isnan(value_mean[center[0], :])))  # left
-            right = np.max(np.where(np.isnan(value_mean[center[0], :]))) + 1  # right
+        rows, cols = self.edgeWindow(value_mean)
+        values = values[..., rows, cols]
+        lons = self.lons[cols]
+        lats = self.lats[rows]
 
-            upper = np.min(np.where(np.isnan(value_mean[:, center[1]])))  # upper
-            low = np.max(np.where(np.isnan(value_mean[:, center[1]]))) + 1  # low
+        return values, lons, lats
 
-            values = values[upper:low, left:right]
-            lons = lons[left:right]
-            lats = lats[upper:low]
+    def spatialLSCF(self, topo_out: str | Path):
+        """Returns the land surface correction factors of the dem, read from
+        topo_out if it exists and overwrite is False.
 
-        return values, lons, lats
+        Parameters
+        ----------
+        topo_out : str or pathlib.Path object
+            Output file of land surface correction factors in netcdf format.
+        """
+        print("Conducting terrain analysis...")
+        if Path(topo_out).exists() and not self.overwrite:
+            print("Find existing file! Reading...")
+            lscf = xr.load_dataset(topo_out)["lscf"].values
+        else:
+            LSCF = landSurCorrectionFac(
+                self.dem, self.resolution, tile=self.terrain_tile
+            )
+            lscf = LSCF.spatialLSCF(topo_out)
+        print("Terrain analysis Done!")
+
+        return lscf
 
     def spatialTemp(
         self,
         topo_out: str | Path,
         types: Literal["ts", "mean"] = "mean",
+        workers: int = 1,
     ):
         """Returns spatialized mean air temperature.
 
@@ -2328,26 +5323,35 @@ class redcappTemp(object):
         types : Literal['mean', 'ts'], optional
             The type of output temperature. 'mean' for mean temperature and 'ts'
             for time-series temperature. The default is 'mean'.
+        workers : int, optional
+            Number of worker processes sharing the time loop. The default is 1.
+            With the jit option of DownScaling, the calling script must be
+            protected by ``if __name__ == "__main__":``.
+
+        Returns
+        -------
+        temp: np.array
+            REDCAPP temperature formatted in [lat, lon] or [time, lat, lon],
+            preceded by [variable] when other variables are downscaled,
+            with the temperature first, see the variables argument.
         """
         # lscf
-        print("Conducting terrain analysis...")
-        if Path(topo_out).exists() and not self.overwrite:
-            print("Find existing file! Reading...")
-            lscf = xr.load_dataset(topo_out)["lscf"].values
-        else:
-            LSCF = landSurCorrectionFac(self.dem, self.resolution)
-            lscf = LSCF.spatialLSCF(topo_out)
-        print("Terrain analysis Done!")
+        lscf = self.spatialLSCF(topo_out)
 
         # upp-air temperature and coarse land-surface effects
-        downscaling = DownScaling(self.geop, self.sa, self.pl, self.dem)
+        downscaling = DownScaling(self.geop, self.sa, self.pl, self.dem, **self.options)
 
+        variable = self.variables if len(self.variables) > 1 else self.variable
         pl, dt, out_time = downscaling.spatial_pl_dt(
-            self.variable, self.daterange, types=types
+            variable, self.daterange, types=types, workers=workers
         )
 
         # redcapp temperaure
-        temp = pl + lscf * dt
+        if len(self.variables) > 1:
+            temp = pl
+            temp[0] = pl[0] + lscf * dt[0]
+        else:
+            temp = pl + lscf * dt
 
         # TODO: remove clip
         temp, lons, lats = self.edgeClip(temp)
@@ -2355,36 +5359,200 @@ class redcappTemp(object):
         return temp, lons, lats, out_time
 
     def stationTemp(self, stations, topo_out):
-        """Returns air temperature time series."""
+        """Returns air temperature time series.
+
+        Returns
+        -------
+        temp: np.array
+            REDCAPP temperature formatted in [time, station], preceded by
+            [variable] when other variables are downscaled, with the
+            temperature first, see the variables argument.
+        time: np.array
+            Dates of the time series
+        names: list of str
+            Names of the stations
+        """
 
         # upp-air temperature and coarse land-surface effects
-        downscaling = DownScaling(self.geop, self.sa, self.pl)
+        downscaling = DownScaling(self.geop, self.sa, self.pl, **self.options)
 
+        variable = self.variables if len(self.variables) > 1 else self.variable
         pl, dt, time, names = downscaling.stationTimeSeries(
-            self.variable, self.daterange, stations
+            variable, self.daterange, stations
         )
 
         # lscf
         print("Temperature Done!")
         print("Conducting terrain analysis...")
         LSCF = landSurCorrectionFac(self.dem, self.resolution)
-        lscf = LSCF.stationLSCF(stations, topo_out)
+        lscf = np.asarray(LSCF.stationLSCF(stations, topo_out))
 
-        # redcapp temperature
-        temp = np.zeros((pl.shape))  # hold temp
-
-        for i in np.arange(len(names)):
-            pli = pl[:, i]
-            dti = pl[:, i]
-            lscfi = lscf[i]
-            temp[:, i] = pli + lscfi * dti
+        # redcapp temperature, other variables without land surface correction
+        if len(self.variables) > 1:
+            temp = pl
+            temp[0] = pl[0] + lscf * dt[0]
+        else:
+            temp = pl + lscf * dt
 
         return temp, time, names
 
+    def temperatureBlocks(self, downscaling, lscf, window, workers=1):
+        """Yields the REDCAPP temperature block of time steps by block of
+        time steps and tile by tile (see DownScaling.spatialBlocks()), on
+        the part of each tile inside a window of the dem.
+
+        Parameters
+        ----------
+        downscaling : DownScaling
+            Downscaling of the dem
+        lscf : np.array
+            Land surface correction factors of the dem
+        window : tuple of slices
+            (rows, cols) window of the dem, e.g. given by edgeWindow()
+        workers : int, optional
+            Number of worker processes sharing the time loop. The default is 1.
+            With the jit option of DownScaling, the calling script must be
+            protected by ``if __name__ == "__main__":``.
+
+        Yields
+        ------
+        index: tuple
+            (ind_out, dst) position of the block in the time steps and in
+            the window, as (rows, cols) slices
+        time: np.array
+            Dates of the block
+        temp: np.array
+            REDCAPP temperature formatted in [variable, time, lat, lon],
+            followed by the upper-air values of the other variables (see
+            the variables argument)
+        """
+        variable = self.variables if len(self.variables) > 1 else self.variable
+        for index, block_time, pl, dt in downscaling.spatialBlocks(
+            variable, self.daterange, workers=workers
+        ):
+            ind_out, rows, cols = index
+            dst, src = _window_overlap((rows, cols), window, lscf.shape)
+            if not all(i.stop > i.start for i in dst):
+                continue
+            src = (slice(None), slice(None)) + src
+            pl = pl.reshape((-1,) + pl.shape[-3:])[src]
+            dt = dt.reshape((-1,) + dt.shape[-3:])[src]
+            # other variables without land surface correction
+            pl[0] = pl[0] + lscf[rows, cols][src[2:]] * dt[0]
+
+            yield (ind_out, dst), block_time, pl
+
+    def reducers(self, reducers, shape):
+        """Returns Reducer objects of given names (see REDUCERS) or classes
+        for fields of given shape."""
+        return [
+            REDUCERS[reducer](shape) if isinstance(reducer, str) else reducer(shape)
+            for reducer in reducers
+        ]
+
+    def spatialStats(
+        self,
+        topo_out: str | Path,
+        reducers: list = ("mean",),
+        workers: int = 1,
+    ):
+        """Returns statistics over time of the REDCAPP temperature, evaluated
+        in a single pass, block of time steps by block of time steps,
+        without keeping the time series (see Reducer).
+
+        Parameters
+        ----------
+        topo_out : str or pathlib.Path object
+            Output file of land surface correction factors in netcdf format.
+        reducers : list, optional
+            Names of the statistics, among the keys of REDUCERS ("mean",
+            "std", "min", "max", "fdd", "tdd", "frost_days", "maat"), or
+            Reducer classes. The default is ("mean",).
+        workers : int, optional
+            Number of worker processes sharing the time loop. The default is 1.
+            With the jit option of DownScaling, the calling script must be
+            protected by ``if __name__ == "__main__":``.
+
+        Returns
+        -------
+        stats: list of Reducer
+            Statistics of the temperature, see Reducer.result()
+        means: list of MeanReducer
+            Means of the other variables (see the variables argument)
+        lons, lats: np.array
+            Coordinates of the statistics, clipped to the area with data as
+            by edgeClip()
+        """
+        lscf = self.spatialLSCF(topo_out)
+        window = self.edgeWindow(lscf)
+        lons = self.lons[window[1]]
+        lats = self.lats[window[0]]
+
+        downscaling = DownScaling(self.geop, self.sa, self.pl, self.dem, **self.options)
+        stats = self.reducers(reducers, (len(lats), len(lons)))
+        means = self.reducers(["mean"] * (len(self.variables) - 1), stats[0].shape)
+        for (ind_out, dst), block_time, values in self.temperatureBlocks(
+            downscaling, lscf, window, workers
+        ):
+            for reducer in stats:
+                reducer.update(values[0], block_time, dst)
+            for reducer, value in zip(means, values[1:]):
+                reducer.update(value, block_time, dst)
+
+        return stats, means, lons, lats
+
+    def statsVariables(self, nc_root, stats):
+        """Writes the statistics (see spatialStats()) as variables [lat, lon]
+        of a netcdf file."""
+        for reducer in stats:
+            out = nc_root.createVariable(reducer.name, "f4", ("lat", "lon"), zlib=True)
+            out.long_name = reducer.long_name
+            out.units = reducer.units
+            out[:] = reducer.result()
+
+    def outputVariables(self, nc_root, dimensions, downscaling, **kwargs):
+        """Creates the output variables of the temperature and of the other
+        downscaled variables (see the variables argument) in a netcdf file.
+
+        Parameters
+        ----------
+        nc_root : netCDF4.Dataset
+            Output file
+        dimensions : tuple of str
+            Dimensions of the variables
+        downscaling : DownScaling
+            Downscaling of the variables, giving their units
+        **kwargs
+            Other arguments of createVariable(), e.g. chunksizes
+
+        Returns
+        -------
+        outputs: list of netCDF4.Variable
+            Output variables in the order of self.variables
+        """
+        Ta = nc_root.createVariable(
+            "surface air temperature", "f4", dimensions, zlib=True, **kwargs
+        )
+        Ta.units = "celsius"
+        outputs = [Ta]
+        for variable in self.variables[1:]:
+            out = nc_root.createVariable(
+                variable, "f4", dimensions, zlib=True, **kwargs
+            )
+            if downscaling.offset(variable):
+                out.units = "celsius"
+            elif hasattr(downscaling.pl[variable], "units"):
+                out.units = downscaling.pl[variable].units
+            outputs.append(out)
+
+        return outputs
+
     def extractSpatialDataNCF(
         self,
         topo_out: str | Path,
         temp_out: str | Path,
+        reducers: list | None = None,
+        workers: int = 1,
     ):
         """Export spatialized mean air temperature of given dem in netcdf format.
 
@@ -2400,9 +5568,26 @@ class redcappTemp(object):
             Output file of land surface correction factors in netcdf format.
         temp_out : str or pathlib.Path object
             Output file of spatialized mean air temperature in netcdf format.
+        reducers : list, optional
+            Other statistics over time of the temperature written along
+            with the mean, see spatialStats(). They are all evaluated in a
+            single pass over the time steps. The default is None.
+        workers : int, optional
+            Number of worker processes sharing the time loop. The default is 1.
+            With the jit option of DownScaling, the calling script must be
+            protected by ``if __name__ == "__main__":``.
         """
 
-        temp, lons, lats, _ = self.spatialTemp(topo_out)
+        if reducers:
+            stats, means, lons, lats = self.spatialStats(
+                topo_out, ["mean"] + list(reducers), workers
+            )
+            temp = np.stack([stats[0].result()] + [m.result() for m in means])
+            stats = stats[1:]
+        else:
+            temp, lons, lats, _ = self.spatialTemp(topo_out, workers=workers)
+            stats = []
+        downscaling = DownScaling(self.geop, self.sa, self.pl)
 
         # create nc file
         nc_root = nc.Dataset(temp_out, "w", format="NETCDF4_CLASSIC")
@@ -2414,20 +5599,19 @@ class redcappTemp(object):
         # create variables
         longitudes = nc_root.createVariable("lon", "f4", ("lon"))
         latitudes = nc_root.createVariable("lat", "f4", ("lat"))
-        Ta = nc_root.createVariable(
-            "surface air temperature", "f4", ("lat", "lon"), zlib=True
-        )
+        outputs = self.outputVariables(nc_root, ("lat", "lon"), downscaling)
 
         # assign variables
         longitudes[:] = lons
         latitudes[:] = lats
-        Ta[:] = temp
+        for out, values in zip(outputs, temp.reshape((-1,) + temp.shape[-2:])):
+            out[:] = values
+        self.statsVariables(nc_root, stats)
 
         # attribute
         nc_root.description = "REDCAPP-derived surface air temperature"
         longitudes.units = "degree_east (decimal)"
         latitudes.units = "degree_north (decimal)"
-        Ta.units = "celsius"
 
         nc_root.close()
 
@@ -2435,10 +5619,15 @@ class redcappTemp(object):
         self,
         topo_out: str | Path,
         temp_out: str | Path,
+        workers: int = 1,
+        reducers: list | None = None,
     ):
         """Export spatialized air temperatures of given dem resolution and given
         time-series in netcdf format.
 
+        The time steps are written to temp_out as soon as they are computed,
+        so that the memory use does not grow with the date range.
+
         .. note::
             Please note that the area of output spatial temperature may be
             smaller than the given dem owing to the mrvbf simulation donot
@@ -2451,8 +5640,24 @@ class redcappTemp(object):
             Output file of land surface correction factors in netcdf format.
         temp_out : str or pathlib.Path object
             Output file of spatialized air temperatures in netcdf format.
+        workers : int, optional
+            Number of worker processes sharing the time loop. The default is 1.
+            With the jit option of DownScaling, the calling script must be
+            protected by ``if __name__ == "__main__":``.
+        reducers : list, optional
+            Statistics over time of the temperature written as variables
+            [lat, lon] along with the time series, see spatialStats(). The
+            default is None.
         """
-        temp, lons, lats, times = self.spatialTemp(topo_out, types="ts")
+        # lscf and the area with data
+        lscf = self.spatialLSCF(topo_out)
+        window = self.edgeWindow(lscf)
+        lons = self.lons[window[1]]
+        lats = self.lats[window[0]]
+
+        # upp-air temperature and coarse land-surface effects
+        downscaling = DownScaling(self.geop, self.sa, self.pl, self.dem, **self.options)
+        _, times = downscaling.timeIndex(self.daterange)
 
         # create nc file
         nc_root = nc.Dataset(temp_out, "w", format="NETCDF4_CLASSIC")
@@ -2466,38 +5671,62 @@ class redcappTemp(object):
         longitudes = nc_root.createVariable("lon", "f4", ("lon"))
         latitudes = nc_root.createVariable("lat", "f4", ("lat"))
         time = nc_root.createVariable("time", "d", ("time"))
-        Ta = nc_root.createVariable(
-            "surface air temperature", "f4", ("time", "lat", "lon"), zlib=True
-        )
-
-        # assign variables
-        longitudes[:] = lons
-        latitudes[:] = lats
-        Ta[:] = temp
-        time[:] = nc.date2num(
-            times,
-            units="seconds since 1970-1-1",
-            calendar="standard",
+        tile = downscaling.tile or (len(lats), len(lons))
+        outputs = self.outputVariables(
+            nc_root,
+            ("time", "lat", "lon"),
+            downscaling,
+            chunksizes=(1, min(tile[0], len(lats)), min(tile[1], len(lons))),
         )
 
         # attribute
         nc_root.description = "REDCAPP-derived surface air temperature"
         longitudes.units = "degree_east (decimal)"
         latitudes.units = "degree_north (decimal)"
-        Ta.units = "celsius"
         time.units = "seconds since 1970-1-1"
         time.calendar = "standard"
 
-        nc_root.close()
+        # assign variables
+        longitudes[:] = lons
+        latitudes[:] = lats
+
+        stats = self.reducers(reducers or [], (len(lats), len(lons)))
+        try:
+            for (ind_out, dst), block_time, temp in self.temperatureBlocks(
+                downscaling, lscf, window, workers
+            ):
+                for out, values in zip(outputs, temp):
+                    out[(ind_out,) + dst] = values
+                for reducer in stats:
+                    reducer.update(temp[0], block_time, dst)
+                time[ind_out] = nc.date2num(
+                    block_time,
+                    units="seconds since 1970-1-1",
+                    calendar="standard",
+                )
+            self.statsVariables(nc_root, stats)
+        finally:
+            nc_root.close()
 
     def extractStationDataCSV(self, stations, topo_out, temp_out):
         """
         Exports air temperature time series of the given stations
-        in csv format
+        in csv format, followed by the upper-air values of the other
+        variables (see the variables argument) in columns named
+        "station variable".
         """
 
         temp, time, names = self.stationTemp(stations, topo_out)
 
+        # other variables follow the temperature, as columns "station variable"
+        if len(self.variables) > 1:
+            names = names + [
+                "{} {}".format(name, variable)
+                for variable in self.variables[1:]
+                for name in names
+            ]
+            temp = temp.transpose(1, 0, 2).reshape(len(time), -1)
+
         # write CSV
         names.insert(0, "Time_UTC")
         with open(temp_out, "w") as output_file:
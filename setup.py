@@ -24,6 +24,7 @@ setuptools.setup(
         "ecmwf-api-client",
         "cdsapi",
     ],
+    extras_require={"jit": ["numba"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GNU GENERAL PUBLIC LICENSE",
@@ -0,0 +1,110 @@
+"""Synthetic reanalysis and dem files shared by the tests."""
+
+from datetime import datetime, timedelta
+
+import netCDF4 as nc
+import numpy as np
+import pytest
+import xarray as xr
+
+G = 9.80665
+LEVELS = np.array([500, 600, 700, 750, 800, 850, 900, 925, 950, 975, 1000])
+
+
+def _dataset(file, dims):
+    root = nc.Dataset(file, "w", format="NETCDF4_CLASSIC")
+    for name, size in dims.items():
+        root.createDimension(name, size)
+    return root
+
+
+@pytest.fixture(scope="module")
+def files(tmp_path_factory):
+    """Synthetic geopotential, surface, pressure level and dem files."""
+    rng = np.random.default_rng(0)
+    root = tmp_path_factory.mktemp("redcapp")
+    glat = np.arange(44.0, 48.01, 0.5)
+    glon = np.arange(6.0, 11.01, 0.5)
+    nt = 6
+    times = [datetime(2015, 12, 1) + timedelta(hours=6 * i) for i in range(nt)]
+    time = nc.date2num(times, units="seconds since 1970-1-1", calendar="standard")
+    lat, lon = np.meshgrid(glat, glon, indexing="ij")
+    topo = 1500 + 1200 * np.sin(lat * 3) * np.cos(lon * 2)
+    height = 8000 * np.log(1013.25 / LEVELS)[None, :, None, None]
+
+    def axes(root, levels=False):
+        root.createVariable("time", "d", ("time",))[:] = time[
+            : len(root.dimensions["time"])
+        ]
+        root.createVariable("lat", "f4", ("lat",))[:] = glat
+        root.createVariable("lon", "f4", ("lon",))[:] = glon
+        if levels:
+            root.createVariable("level", "i4", ("level",))[:] = LEVELS
+
+    dims = {"time": 1, "lat": glat.size, "lon": glon.size}
+    with _dataset(root / "geop.nc", dims) as geop:
+        axes(geop)
+        geop.createVariable("Geopotential", "f4", ("time", "lat", "lon"))[:] = (
+            topo[None] * G
+        )
+
+    dims["time"] = nt
+    with _dataset(root / "sa.nc", dims) as sa:
+        axes(sa)
+        sa.createVariable("2 metre temperature", "f4", ("time", "lat", "lon"))[:] = (
+            280 - 0.0065 * topo + rng.normal(0, 2, (nt,) + topo.shape)
+        )
+
+    dims["level"] = LEVELS.size
+    shape = (nt, LEVELS.size) + topo.shape
+    with _dataset(root / "pl.nc", dims) as pl:
+        axes(pl, levels=True)
+        dimensions = ("time", "level", "lat", "lon")
+        pl.createVariable("Temperature", "f4", dimensions)[:] = (
+            288 - 0.0065 * height + rng.normal(0, 1.5, shape)
+        )
+        pl.createVariable("Geopotential", "f4", dimensions)[:] = (
+            height + 30 * np.sin(lat + lon) + rng.normal(0, 5, shape)
+        ) * G
+
+    dlat = np.arange(47.2, 45.0, -1 / 60.0)
+    dlon = np.arange(7.1, 10.2, 1 / 60.0)
+    dlat2, dlon2 = np.meshgrid(dlat, dlon, indexing="ij")
+    ele = 1500 + 1200 * np.sin(dlat2 * 3) * np.cos(dlon2 * 2)
+    ele += 400 * np.sin(dlat2 * 40) * np.sin(dlon2 * 35)
+    elevation = xr.DataArray(
+        np.clip(ele, 200, None).astype("f4")[None],
+        dims=("band", "lat", "lon"),
+        coords={"band": [1], "lat": dlat, "lon": dlon},
+    )
+    spatial_ref = xr.DataArray(
+        0, attrs={"GeoTransform": f"{dlon[0]} {1 / 60.0} 0 {dlat[0]} 0 {-1 / 60.0}"}
+    )
+    xr.Dataset({"elevation": elevation, "spatial_ref": spatial_ref}).to_netcdf(
+        root / "dem.nc"
+    )
+
+    return [str(root / name) for name in ("geop.nc", "sa.nc", "pl.nc", "dem.nc")]
+
+
+@pytest.fixture(scope="session")
+def terrain(tmp_path_factory):
+    """Synthetic dem of 30 arc seconds and its resolution, large enough for
+    the 30 km neighbourhood and 5 steps of MRVBF, and wider than the halo
+    of MRVBF so that tiles have seams across the columns."""
+    rng = np.random.default_rng(1)
+    resolution = 1 / 120.0
+    lat = 47.0 - resolution * np.arange(180)
+    lon = 8.0 + resolution * np.arange(720)
+    lat2, lon2 = np.meshgrid(lat, lon, indexing="ij")
+    ele = 1500 + 900 * np.sin(lat2 * 9) * np.cos(lon2 * 7)
+    ele += 300 * np.sin(lat2 * 60) * np.sin(lon2 * 45) + rng.normal(0, 15, ele.shape)
+    elevation = xr.DataArray(
+        np.clip(ele, 200, None).astype("f4")[None],
+        dims=("band", "lat", "lon"),
+        coords={"band": [1], "lat": lat, "lon": lon},
+    )
+    file = tmp_path_factory.mktemp("terrain") / "dem.nc"
+    xr.Dataset({"elevation": elevation}).to_netcdf(file)
+
+    return str(file), resolution
@@ -0,0 +1,132 @@
+"""Equivalence of the paths of DownScaling."""
+
+import os
+from bisect import bisect_left
+from datetime import datetime
+
+import netCDF4 as nc
+import numpy as np
+import pytest
+
+from redcapp.redcapp import DownScaling, _level_bracket, _numba_threads
+
+DATERANGE = {"beg": datetime(2015, 12, 1), "end": datetime(2015, 12, 2, 6)}
+
+
+@pytest.mark.parametrize("order", ["raster", "cell"])
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+def test_jit_matches_numpy(files, order, dtype):
+    pytest.importorskip("numba")
+    window = (slice(10, 70), slice(20, 110))
+    values = []
+    for jit in (False, True):
+        downscaling = DownScaling(*files, jit=jit, dtype=dtype, order=order)
+        assert downscaling.jit == jit
+        geometry, _ = downscaling.spatialGeometry(window)
+        values.append(
+            np.stack(downscaling.interpAll("Temperature", slice(0, 6), *geometry))
+        )
+
+    numpy_path, jit_path = values
+    assert jit_path.dtype == numpy_path.dtype == np.dtype(dtype)
+    assert np.isfinite(numpy_path).all()
+    # the kernel sums in another order than the NumPy path
+    tolerance = {"float64": 1e-9, "float32": 1e-3}[dtype]
+    np.testing.assert_allclose(jit_path, numpy_path, rtol=0, atol=tolerance)
+
+
+def test_jit_starts_numba_threads(files):
+    pytest.importorskip("numba")
+    downscaling = DownScaling(*files, jit=True)
+    geometry, _ = downscaling.spatialGeometry((slice(0, 20), slice(0, 30)))
+    downscaling.interpAll("Temperature", slice(0, 2), *geometry)
+
+    # later pools of the process must be spawned, see mapBlocks()
+    assert _numba_threads()
+
+
+def test_jit_without_numba_warns(files, monkeypatch):
+    monkeypatch.setattr("redcapp.redcapp.njit", None)
+    with pytest.warns(RuntimeWarning, match="numba"):
+        downscaling = DownScaling(*files, jit=True)
+    assert not downscaling.jit
+
+
+def test_cache_follows_umask(files, tmp_path):
+    window = (slice(0, 20), slice(0, 30))
+    mask = os.umask(0o022)
+    try:
+        downscaling = DownScaling(*files, cache=tmp_path)
+        computed, _ = downscaling.spatialGeometry(window)
+    finally:
+        os.umask(mask)
+
+    (file,) = tmp_path.glob("geometry_*.npz")
+    assert file.stat().st_mode & 0o777 == 0o644
+    cached, _ = downscaling.spatialGeometry(window)
+    np.testing.assert_array_equal(cached[0].geop, computed[0].geop)
+
+
+@pytest.mark.parametrize("guess", [None, "close", "random"])
+def test_level_bracket_matches_bisect_left(files, guess):
+    rng = np.random.default_rng(4)
+    with nc.Dataset(files[2]) as pl:
+        z = pl["Geopotential"][:].filled()
+    with nc.Dataset(files[3]) as dem:
+        ele = dem["elevation"][0, ::7, ::9].filled().ravel() * 9.80665
+    # geopotential ascending along the levels, in [time, level, site]
+    z = z[:, ::-1].reshape(z.shape[:2] + (-1,))
+    nt, nlev, ncol = z.shape
+    col = rng.integers(0, ncol, ele.size)
+    # elevations on the levels and beyond the profiles
+    ele[:5] = z[0, rng.integers(0, nlev, 5), col[:5]]
+    ele[5:7] = [z.min() - 100, z.max() + 100]
+
+    expected = np.array(
+        [
+            [bisect_left(z[t, :, c].tolist(), e) for e, c in zip(ele, col)]
+            for t in range(nt)
+        ]
+    )
+    expected = np.clip(expected, 1, nlev - 1)
+    if guess == "close":
+        guess = np.clip(expected[0] + rng.integers(-2, 3, ele.size), 0, nlev)
+    elif guess == "random":
+        guess = rng.integers(0, nlev + 1, ele.size)
+
+    np.testing.assert_array_equal(_level_bracket(z, ele, col, guess), expected)
+
+
+@pytest.mark.parametrize("types", ["ts", "mean"])
+@pytest.mark.parametrize("block, tile", [(4, None), (1, 40), (4, (50, 70))])
+def test_blocks_match_unblocked(files, types, block, tile):
+    reference = DownScaling(*files).spatial_pl_dt("Temperature", DATERANGE, types)
+    downscaling = DownScaling(*files, block=block, tile=tile)
+    pl, dt, time = downscaling.spatial_pl_dt("Temperature", DATERANGE, types)
+
+    assert np.isfinite(pl).all() and np.isfinite(dt).all()
+    np.testing.assert_array_equal(time, reference[2])
+    # the mean sums the blocks in another order
+    tolerance = {"ts": 0, "mean": 1e-12}[types]
+    np.testing.assert_allclose(pl, reference[0], rtol=0, atol=tolerance)
+    np.testing.assert_allclose(dt, reference[1], rtol=0, atol=tolerance)
+
+
+@pytest.mark.parametrize("types", ["ts", "mean"])
+@pytest.mark.parametrize("block, tile", [(1, None), (2, (50, 70))])
+def test_workers_match_single_process(files, types, block, tile):
+    downscaling = DownScaling(*files, block=block, tile=tile)
+    single = downscaling.spatial_pl_dt("Temperature", DATERANGE, types)
+    pool = downscaling.spatial_pl_dt("Temperature", DATERANGE, types, workers=3)
+
+    for values, expected in zip(pool, single):
+        np.testing.assert_array_equal(values, expected)
+
+
+def test_ele_is_numpy(files):
+    downscaling = DownScaling(*files)
+    geop, _, _, shape = downscaling.demGrid()
+
+    assert isinstance(downscaling.ele, np.ndarray)
+    assert downscaling.ele.shape == shape
+    np.testing.assert_array_equal((downscaling.ele * downscaling.g).ravel(), geop[:, 2])
@@ -0,0 +1,54 @@
+"""Options of redcappTemp reaching the downscaling and terrain analysis."""
+
+from datetime import datetime
+
+import netCDF4 as nc
+import numpy as np
+import xarray as xr
+
+from redcapp.redcapp import DownScaling, redcappTemp
+
+DATERANGE = {"beg": datetime(2015, 12, 1), "end": datetime(2015, 12, 2, 6)}
+
+
+def _topo(file, dem):
+    """Writes a constant land surface correction factor of the dem."""
+    shape = xr.open_dataset(dem)["elevation"].shape[-2:]
+    lscf = xr.DataArray(np.full(shape, 0.5), dims=("lat", "lon"))
+    xr.Dataset({"lscf": lscf}).to_netcdf(file)
+
+
+def test_tile_reaches_downscaling(files, tmp_path):
+    geop, sa, pl, dem = files
+    _topo(tmp_path / "topo.nc", dem)
+    redcapp = redcappTemp(geop, sa, pl, DATERANGE, dem, tile=40, block=2)
+
+    assert redcapp.terrain_tile is None
+    assert DownScaling(geop, sa, pl, dem, **redcapp.options).tile == (40, 40)
+    redcapp.extractSpatialDataNCF_TS(tmp_path / "topo.nc", tmp_path / "ts.nc")
+    with nc.Dataset(tmp_path / "ts.nc") as root:
+        assert root["surface air temperature"].chunking() == [1, 40, 40]
+
+
+def test_station_variables(files, tmp_path):
+    geop, sa, pl, dem = files
+    stations = [
+        {"name": "A", "lat": 46.41, "lon": 8.82, "ele": 3350.5},
+        {"name": "B", "lat": 46.02, "lon": 9.37, "ele": 1756.2},
+    ]
+    temp = redcappTemp(geop, sa, pl, DATERANGE, dem)
+    single, time, names = temp.stationTemp(stations, tmp_path / "lscf.csv")
+    multi = redcappTemp(geop, sa, pl, DATERANGE, dem, variables=["Geopotential"])
+    values, _, _ = multi.stationTemp(stations, tmp_path / "lscf.csv")
+
+    assert values.shape == (2,) + single.shape == (2, len(time), len(names))
+    assert np.isfinite(values).all()
+    np.testing.assert_array_equal(values[0], single)
+    downscaling = DownScaling(geop, sa, pl)
+    upper, _, _, _ = downscaling.stationTimeSeries("Geopotential", DATERANGE, stations)
+    np.testing.assert_array_equal(values[1], upper)
+
+    multi.extractStationDataCSV(stations, tmp_path / "lscf.csv", tmp_path / "ts.csv")
+    with open(tmp_path / "ts.csv") as f:
+        header = f.readline().strip().split(",")
+    assert header == ["Time_UTC", "A", "B", "A Geopotential", "B Geopotential"]
@@ -0,0 +1,113 @@
+"""Equivalence of the fast terrain analysis with reference computations."""
+
+import netCDF4 as nc
+import numpy as np
+import pytest
+from scipy.interpolate import RegularGridInterpolator
+from scipy.ndimage import generic_filter
+
+from redcapp.redcapp import (
+    _grid_interp,
+    _rank_count,
+    _rank_count_binned,
+    landSurCorrectionFac,
+    topography,
+)
+
+
+def _grid(ties):
+    rng = np.random.default_rng(2)
+    values = rng.normal(0, 100, (40, 50))
+    if ties:
+        values = np.round(values / 20)
+    values[3, 4] = np.nan
+    values[20:22, 30] = np.nan
+    return values
+
+
+def _generic_rank(values, size):
+    return generic_filter(
+        values, lambda x: np.sum(x <= x[(x.size - 1) // 2]), size=size
+    )
+
+
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("size", [6, 7, 13])
+def test_rank_count_matches_generic_filter(size, ties):
+    values = _grid(ties)
+    np.testing.assert_array_equal(
+        _rank_count(values, size), _generic_rank(values, size)
+    )
+
+
+@pytest.mark.parametrize("ties", [False, True])
+@pytest.mark.parametrize("bins", [None, 4])
+def test_rank_count_binned_matches_generic_filter(bins, ties):
+    values = _grid(ties)
+    sizes = [6, 7, 13, 31]
+    count = _rank_count_binned(values, sizes, bins=bins)
+    assert count.shape == (len(sizes),) + values.shape
+    for size, values_size in zip(sizes, count):
+        np.testing.assert_array_equal(values_size, _generic_rank(values, size))
+    np.testing.assert_array_equal(_rank_count_binned(values, 13, bins=bins), count[2])
+
+
+@pytest.mark.parametrize("size", [2**22, 500])
+def test_grid_interp_matches_regular_grid_interpolator(size):
+    rng = np.random.default_rng(3)
+    # descending latitudes as in the dem, the fine grid reaching past the
+    # coarse one on every side
+    lats = 47.0 - np.arange(100) / 120.0
+    lons = 8.0 + np.arange(130) / 120.0
+    grid_lats, grid_lons = lats[1::3], lons[1::3]
+    values = rng.normal(size=(grid_lats.size, grid_lons.size))
+
+    f = RegularGridInterpolator(
+        (grid_lats[::-1], grid_lons),
+        values[::-1],
+        method="linear",
+        bounds_error=False,
+        fill_value=None,
+    )
+    sites = np.stack(np.meshgrid(lats, lons, indexing="ij"), axis=-1)
+    np.testing.assert_allclose(
+        _grid_interp(grid_lats, grid_lons, values, lats, lons, size=size),
+        f(sites.reshape(-1, 2)).reshape(lats.size, lons.size),
+        rtol=0,
+        atol=1e-12,
+    )
+
+
+def test_tiled_lscf_matches_monolithic(terrain, tmp_path):
+    dem, resolution = terrain
+    lscf, fields = [], []
+    for tile in (None, (60, 160)):
+        file = tmp_path / "lscf_{}.nc".format(tile is not None)
+        lscf.append(landSurCorrectionFac(dem, resolution, tile=tile).spatialLSCF(file))
+        with nc.Dataset(file) as root:
+            fields.append(
+                {name: root[name][:] for name in ("hypso", "mrvbf", "eleRange", "lscf")}
+            )
+
+    assert np.isfinite(lscf[0]).all()
+    np.testing.assert_array_equal(lscf[1], lscf[0])
+    for name, values in fields[0].items():
+        np.testing.assert_array_equal(fields[1][name], values, err_msg=name)
+
+
+@pytest.mark.parametrize("fine", [False, True])
+def test_spatial_radii_matches_single_radius(terrain, tmp_path, fine):
+    dem, resolution = terrain
+    topo = topography(dem, resolution)
+    bounds = (10, 20, 30)
+    file = tmp_path / "radii.nc"
+    topo.spatialRadii(file, bounds=bounds, fine=fine)
+
+    with nc.Dataset(file) as root:
+        np.testing.assert_array_equal(root["bound"][:], bounds)
+        for i, bound in enumerate(bounds):
+            hypso = topo.hypso(bound) if fine else topo.coarseHypso(bound)
+            np.testing.assert_array_equal(root["hypso"][i], hypso.astype("f4"))
+            np.testing.assert_array_equal(
+                root["eleRange"][i], topo.eleRange(bound).astype("f4")
+            )